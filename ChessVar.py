@@ -1,4 +1,5 @@
-from typing import Union
+import random
+from typing import NamedTuple, Optional, Sequence, Union
 
 
 def convert_coordinates_to_board_index(coordinates):
@@ -37,6 +38,322 @@ def convert_board_index_to_coordinates(board_index):
     return coordinates
 
 
+# colors and piece types as small integer codes
+# a piece code combines both as color * 6 + piece type and indexes the bitboard list of ChessVar
+WHITE = 0
+BLACK = 1
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+COLOR_NAMES = ("white", "black")
+PIECE_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+PIECE_UNICODE = (
+    "\u2659", "\u2658", "\u2657", "\u2656", "\u2655", "\u2654",
+    "\u265F", "\u265E", "\u265D", "\u265C", "\u265B", "\u265A"
+)
+
+# squares are numbered 0 to 63 with a1 = 0, b1 = 1, ..., h8 = 63, so square = row index * 8 + column index
+SQUARE_NAMES = tuple(convert_board_index_to_coordinates([square // 8, square % 8]) for square in range(64))
+SQUARE_INDEXES = {name: square for square, name in enumerate(SQUARE_NAMES)}
+
+# game states in the order of their codes in the binary position format
+GAME_STATES = ("UNFINISHED", "WHITE_WON", "BLACK_WON")
+
+# atomic FEN strings hold the piece placement from rank 8 to rank 1 with one letter per piece code,
+# the current player as w or b, the squares of the unmoved pawns or -, and the game state
+FEN_PIECES = "PNBRQKpnbrqk"
+STARTING_FEN = (
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w a2b2c2d2e2f2g2h2a7b7c7d7e7f7g7h7 UNFINISHED"
+)
+
+# binary positions are 25 bytes: a header byte of black to move | game state code << 1,
+# the little-endian occupied bitboard, and one nibble per occupied square from a1 to h8, low nibble first,
+# holding the piece code or UNMOVED_PAWN_CODE + color for pawns that have not made their first move
+POSITION_BYTES = 25
+UNMOVED_PAWN_CODE = 12
+
+
+def _step_squares(square: int, steps: tuple) -> tuple[int, ...]:
+    """Returns the on-board squares that are one (row, column) step away from the square, in step order"""
+    row, col = divmod(square, 8)
+    return tuple(
+        (row + row_step) * 8 + col + col_step
+        for row_step, col_step in steps
+        if 0 <= row + row_step < 8 and 0 <= col + col_step < 8
+    )
+
+
+def _ray_squares(square: int, step: tuple[int, int]) -> tuple[int, ...]:
+    """Returns the squares from the square to the board edge in one direction, nearest first"""
+    row, col = divmod(square, 8)
+    squares = []
+    row, col = row + step[0], col + step[1]
+    while 0 <= row < 8 and 0 <= col < 8:
+        squares.append(row * 8 + col)
+        row, col = row + step[0], col + step[1]
+    return tuple(squares)
+
+
+def squares_to_bitboard(squares) -> int:
+    """Returns a bitboard with the bits of the squares set"""
+    bitboard = 0
+    for square in squares:
+        bitboard |= 1 << square
+    return bitboard
+
+
+def bitboard_squares(bitboard: int) -> list[int]:
+    """Returns the squares of the set bits of a bitboard, lowest square first"""
+    squares = []
+    while bitboard:
+        bit = bitboard & -bitboard
+        squares.append(bit.bit_length() - 1)
+        bitboard ^= bit
+    return squares
+
+
+# move and attack tables, built once per square and shared by all pieces and games
+# the square tuples keep the step order of the original move generators
+KNIGHT_STEPS = ((1, 2), (1, -2), (-1, -2), (-1, 2), (2, 1), (2, -1), (-2, 1), (-2, -1))
+KING_STEPS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+KNIGHT_SQUARES = tuple(_step_squares(square, KNIGHT_STEPS) for square in range(64))
+KING_SQUARES = tuple(_step_squares(square, KING_STEPS) for square in range(64))
+KNIGHT_ATTACKS = tuple(squares_to_bitboard(squares) for squares in KNIGHT_SQUARES)
+KING_ATTACKS = tuple(squares_to_bitboard(squares) for squares in KING_SQUARES)
+
+# explosion tables
+# the surrounding squares keep the order of the original get_surrounding_squares,
+# an explosion mask is the 3x3 neighbourhood of a square including the square itself
+SURROUNDING_STEPS = ((1, -1), (1, 0), (1, 1), (-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1))
+SURROUNDING_SQUARES = tuple(_step_squares(square, SURROUNDING_STEPS) for square in range(64))
+EXPLOSION_MASKS = tuple(KING_ATTACKS[square] | 1 << square for square in range(64))
+
+# pawn tables are indexed by color and then square
+PAWN_STEP_SQUARES = tuple(
+    tuple(_step_squares(square, ((forward, 0), (2 * forward, 0))) for square in range(64))
+    for forward in (1, -1)
+)
+PAWN_CAPTURE_SQUARES = tuple(
+    tuple(_step_squares(square, ((forward, -1), (forward, 1))) for square in range(64))
+    for forward in (1, -1)
+)
+PAWN_PUSHES = tuple(
+    tuple(squares_to_bitboard(_step_squares(square, ((forward, 0),))) for square in range(64))
+    for forward in (1, -1)
+)
+PAWN_DOUBLE_PUSHES = tuple(
+    tuple(squares_to_bitboard(_step_squares(square, ((2 * forward, 0),))) for square in range(64))
+    for forward in (1, -1)
+)
+PAWN_ATTACKS = tuple(
+    tuple(squares_to_bitboard(squares) for squares in PAWN_CAPTURE_SQUARES[color]) for color in (WHITE, BLACK)
+)
+
+# ray tables are indexed by direction and then square
+# directions 0 to 3 are the rook directions (left, right, up, down),
+# directions 4 to 7 are the bishop directions (up left, up right, down left, down right)
+DIRECTION_STEPS = ((0, -1), (0, 1), (1, 0), (-1, 0), (1, -1), (1, 1), (-1, -1), (-1, 1))
+ROOK_DIRECTIONS = (0, 1, 2, 3)
+BISHOP_DIRECTIONS = (4, 5, 6, 7)
+RAY_SQUARES = tuple(tuple(_ray_squares(square, step) for square in range(64)) for step in DIRECTION_STEPS)
+RAYS = tuple(tuple(squares_to_bitboard(squares) for squares in ray_squares) for ray_squares in RAY_SQUARES)
+ROOK_LINES = tuple(RAYS[0][square] | RAYS[1][square] | RAYS[2][square] | RAYS[3][square] for square in range(64))
+BISHOP_LINES = tuple(RAYS[4][square] | RAYS[5][square] | RAYS[6][square] | RAYS[7][square] for square in range(64))
+
+# squares strictly between two squares on a shared line, indexed by from square and then to square
+BETWEEN = tuple([0] * 64 for _ in range(64))
+for _square in range(64):
+    for _ray in RAY_SQUARES:
+        for _index, _target in enumerate(_ray[_square]):
+            BETWEEN[_square][_target] = squares_to_bitboard(_ray[_square][:_index])
+BETWEEN = tuple(tuple(row) for row in BETWEEN)
+
+# (rays, ray points towards h8) pairs of the sliding directions
+# the nearest blocker of a ray pointing towards h8 is its lowest set bit, otherwise its highest set bit
+_ROOK_RAYS = tuple(
+    (RAYS[direction], DIRECTION_STEPS[direction][0] * 8 + DIRECTION_STEPS[direction][1] > 0)
+    for direction in ROOK_DIRECTIONS
+)
+_BISHOP_RAYS = tuple(
+    (RAYS[direction], DIRECTION_STEPS[direction][0] * 8 + DIRECTION_STEPS[direction][1] > 0)
+    for direction in BISHOP_DIRECTIONS
+)
+
+
+def _sliding_attacks(square: int, occupied: int, rays: tuple) -> int:
+    """Returns the squares attacked along the rays, up to and including the nearest blocker of each ray"""
+    attacks = 0
+    for ray_table, points_towards_h8 in rays:
+        ray = ray_table[square]
+        blockers = ray & occupied
+        if blockers:
+            if points_towards_h8:
+                ray ^= ray_table[(blockers & -blockers).bit_length() - 1]
+            else:
+                ray ^= ray_table[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square: int, occupied: int) -> int:
+    """Returns a bitboard of the squares a rook on the square attacks"""
+    return _sliding_attacks(square, occupied, _ROOK_RAYS)
+
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    """Returns a bitboard of the squares a bishop on the square attacks"""
+    return _sliding_attacks(square, occupied, _BISHOP_RAYS)
+
+
+def queen_attacks(square: int, occupied: int) -> int:
+    """Returns a bitboard of the squares a queen on the square attacks"""
+    return _sliding_attacks(square, occupied, _ROOK_RAYS) | _sliding_attacks(square, occupied, _BISHOP_RAYS)
+
+
+def piece_targets(piece_code: int, square: int, occupied: int, own_pieces: int, first_move: bool) -> int:
+    """Returns a bitboard of the squares the piece can move to.
+    Matches the possible_moves methods of the ChessPiece subclasses.
+
+    Args:
+        piece_code: An integer combining the color and piece type as color * 6 + piece type
+        square: An integer from 0 (a1) to 63 (h8) of the piece
+        occupied: A bitboard of all occupied squares
+        own_pieces: A bitboard of the squares occupied by pieces of the same color
+        first_move: A boolean that is true for pawns that have not made their first move
+    Returns:
+        An integer bitboard of the target squares
+    """
+    piece_type = piece_code % 6
+    if piece_type == PAWN:
+        color = piece_code // 6
+        targets = PAWN_PUSHES[color][square] & ~occupied
+        if first_move:
+            targets |= PAWN_DOUBLE_PUSHES[color][square] & ~occupied
+        # pawns can step diagonally onto any occupied square
+        return targets | PAWN_ATTACKS[color][square] & occupied
+    if piece_type == KNIGHT:
+        return KNIGHT_ATTACKS[square] & ~own_pieces
+    if piece_type == KING:
+        return KING_ATTACKS[square] & ~occupied
+    if piece_type == BISHOP:
+        return bishop_attacks(square, occupied) & ~own_pieces
+    if piece_type == ROOK:
+        return rook_attacks(square, occupied) & ~own_pieces
+    return queen_attacks(square, occupied) & ~own_pieces
+
+
+def is_piece_target(piece_code: int, from_square: int, to_square: int, occupied: int, own_pieces: int,
+                    first_move: bool) -> bool:
+    """Returns true if the piece on from_square can move to to_square, using a few table lookups.
+    Gives the same answer as testing to_square against piece_targets.
+    """
+    to_bit = 1 << to_square
+    piece_type = piece_code % 6
+    if piece_type == PAWN:
+        color = piece_code // 6
+        if PAWN_ATTACKS[color][from_square] & to_bit:
+            return bool(occupied & to_bit)
+        if occupied & to_bit:
+            return False
+        return bool(PAWN_PUSHES[color][from_square] & to_bit
+                    or first_move and PAWN_DOUBLE_PUSHES[color][from_square] & to_bit)
+    if own_pieces & to_bit:
+        return False
+    if piece_type == KNIGHT:
+        return bool(KNIGHT_ATTACKS[from_square] & to_bit)
+    if piece_type == KING:
+        return not occupied & to_bit and bool(KING_ATTACKS[from_square] & to_bit)
+    if piece_type == BISHOP:
+        lines = BISHOP_LINES[from_square]
+    elif piece_type == ROOK:
+        lines = ROOK_LINES[from_square]
+    else:
+        lines = ROOK_LINES[from_square] | BISHOP_LINES[from_square]
+    return bool(lines & to_bit) and not BETWEEN[from_square][to_square] & occupied
+
+
+def piece_attacks(piece_code: int, square: int, occupied: int) -> int:
+    """Returns a bitboard of the squares the piece could capture on, whatever occupies them.
+    Kings cannot capture, so they attack no squares.
+    """
+    piece_type = piece_code % 6
+    if piece_type == PAWN:
+        return PAWN_ATTACKS[piece_code // 6][square]
+    if piece_type == KNIGHT:
+        return KNIGHT_ATTACKS[square]
+    if piece_type == KING:
+        return 0
+    if piece_type == BISHOP:
+        return bishop_attacks(square, occupied)
+    if piece_type == ROOK:
+        return rook_attacks(square, occupied)
+    return queen_attacks(square, occupied)
+
+
+# zobrist keys for each piece code on each square, each unmoved pawn square, and black to move
+# a fixed seed keeps position keys identical across processes and runs
+_zobrist_random = random.Random(20240611)
+ZOBRIST_PIECES = tuple(tuple(_zobrist_random.getrandbits(64) for _ in range(64)) for _ in range(12))
+ZOBRIST_UNMOVED_PAWNS = tuple(_zobrist_random.getrandbits(64) for _ in range(64))
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+
+
+# moves are packed into integers as from square | to square << 6 | flags << 12
+MOVE_CAPTURE = 1
+MOVE_KILLS_KING = 2
+MOVE_DOUBLE_STEP = 4
+
+# reasons make_move rejects a move, in the order it checks them
+MOVE_ACCEPTED = 0
+REJECT_NO_PIECE = 1
+REJECT_WRONG_COLOR = 2
+REJECT_ILLEGAL_GEOMETRY = 3
+REJECT_GAME_OVER = 4
+REJECT_BOTH_KINGS = 5
+REJECT_REASONS = ("accepted", "no piece", "wrong color", "illegal geometry", "game over", "both kings explode")
+
+
+class AppliedMoves(NamedTuple):
+    """The result of ChessVar.apply_moves.
+
+    Attributes:
+        applied: The number of moves made
+        failed_index: The index of the first rejected move, or None if every move was made
+        reason: MOVE_ACCEPTED, or the REJECT code of the first rejected move
+    """
+    applied: int
+    failed_index: Optional[int]
+    reason: int
+
+
+def encode_move(from_square: int, to_square: int, flags: int = 0) -> int:
+    """Packs a move into an integer"""
+    return from_square | to_square << 6 | flags << 12
+
+
+def move_from_square(move: int) -> int:
+    """Returns the from square of a packed move"""
+    return move & 63
+
+
+def move_to_square(move: int) -> int:
+    """Returns the to square of a packed move"""
+    return move >> 6 & 63
+
+
+def move_flags(move: int) -> int:
+    """Returns the flags of a packed move"""
+    return move >> 12
+
+
+def move_to_coordinates(move: int) -> tuple[str, str]:
+    """Returns the move_from and move_to algebraic coordinates of a packed move"""
+    return SQUARE_NAMES[move & 63], SQUARE_NAMES[move >> 6 & 63]
+
+
 class Player:
     """A class to represent a player in the atomic chess game.
     Used by the ChessVar class.
@@ -59,28 +376,68 @@ class ChessVar:
     Uses ChessPiece subclasses to initialize chess pieces on the board.
 
     Attributes:
+        representation: A string that selects how the board is stored, either "objects" or "bitboards".
         board: A list of lists that each represent a row on the game board.
             Each row list contains list items ordered based on their column on the board.
             The list items are either an empty string to represent an empty square
             or the unicode of a chess piece.
+            None when the representation is "bitboards".
         rows: An integer count of how many rows the board has.
         columns: An integer count of how many columns the board has.
         game_state: A string indicating the current status of the game.
         chess_pieces: A dictionary of all chess pieces currently on the board.
             The keys are algebraic coordinates and the values are the ChessPiece instances.
+            None when the representation is "bitboards".
+        piece_bitboards: A list of 12 integers, one 64-bit bitboard for each piece code.
+        color_bitboards: A list of 2 integers with the occupancy bitboards of the white and black pieces.
+        occupied: An integer bitboard of all occupied squares.
+        unmoved_pawns: An integer bitboard of the pawns that have not made their first move yet.
+        legal_moves: A cached tuple of the packed legal moves of the current player,
+            or None when the position has changed since they were generated.
+        piece_attacks: A dictionary of the attack bitboard of the piece on every occupied square,
+            see piece_attacks, or None until the first attack query.
+        dirty_squares: An integer bitboard of the squares changed since piece_attacks was last brought up to date.
+        attack_maps: A cached list of the white and black attack bitboards,
+            or None when piece_attacks has changed since they were combined.
+        move_cache: A dictionary of the packed moves of pieces by square, each with a bitboard of the squares
+            the moves depend on, or None until moves are first generated.
+        move_dirty_squares: An integer bitboard of the squares changed since move_cache was last updated.
+        zobrist_key: A 64-bit integer key of the position, updated incrementally on every change
+            of a piece, an unmoved pawn, or the current player.
+        undo_stack: A list of undo records, one for each move made with make_move or push_move.
+            Each record is a tuple of the packed move, the removed pieces packed as piece_code << 6 | square,
+            the unmoved pawns bitboard, and the game state from before the move.
         players: A dictionary of the 2 players of the game.
         current_player: A string that indicates the color of the current player.
     """
 
-    def __init__(self):
+    def __init__(self, representation: str = "objects"):
         """Initializes an instance of an atomic chess game. All data members are private.
-        Takes no parameters.
+
+        Args:
+            representation: "objects" keeps the board list and ChessPiece instances next to the bitboards,
+                "bitboards" keeps only the bitboards, which is faster and uses far less memory per game.
         """
-        self._board = []
+        if representation not in ("objects", "bitboards"):
+            raise ValueError(f"Unknown board representation: {representation}")
+        self._representation = representation
+        self._board = [] if representation == "objects" else None
         self._rows = 8
         self._columns = self._rows
         self._game_state = "UNFINISHED"
-        self._chess_pieces = {}
+        self._chess_pieces = {} if representation == "objects" else None
+        self._piece_bitboards = [0] * 12
+        self._color_bitboards = [0, 0]
+        self._occupied = 0
+        self._unmoved_pawns = 0
+        self._legal_moves = None
+        self._piece_attacks = None
+        self._dirty_squares = 0
+        self._attack_maps = None
+        self._move_cache = None
+        self._move_dirty_squares = 0
+        self._undo_stack = []
+        self._zobrist_key = 0
         self._players = {}
         self._current_player = "white"
         self.initialize_board()
@@ -92,102 +449,344 @@ class ChessVar:
         """
 
         # generate blank board
-        for row in range(self._rows):
-            self._board.append([])
+        if self._board is not None:
+            for row in range(self._rows):
+                self._board.append([])
+                for col in range(self._columns):
+                    self._board[row].append(" ")
+
+        # initialize white and black pawns
+        for color, row_index in ((WHITE, 1), (BLACK, 6)):
             for col in range(self._columns):
-                self._board[row].append(" ")
-
-        # initialize white pawns
-        for col in range(self._columns):
-            row_index = 1
-            coordinates = convert_board_index_to_coordinates([row_index, col])
-            pawn = Pawn("pawn", "white", coordinates)
-            self._board[row_index][col] = pawn
-            self._chess_pieces[coordinates] = pawn
-
-        # initialize black pawns
-        for col in range(self._columns):
-            row_index = 6
-            coordinates = convert_board_index_to_coordinates([row_index, col])
-            pawn = Pawn("pawn", "black", coordinates)
-            self._board[row_index][col] = pawn
-            self._chess_pieces[coordinates] = pawn
-
-        # initialize rooks
-        rook = Rook("rook", "white", "a1")
-        self._board[0][0] = rook
-        self._chess_pieces[rook.get_coordinates()] = rook
-        rook = Rook("rook", "white", "h1")
-        self._board[0][7] = rook
-        self._chess_pieces[rook.get_coordinates()] = rook
-        rook = Rook("rook", "black", "a8")
-        self._board[7][0] = rook
-        self._chess_pieces[rook.get_coordinates()] = rook
-        rook = Rook("rook", "black", "h8")
-        self._board[7][7] = rook
-        self._chess_pieces[rook.get_coordinates()] = rook
-
-        # initialize bishops
-        bishop = Bishop("bishop", "white", "c1")
-        self._board[0][2] = bishop
-        self._chess_pieces[bishop.get_coordinates()] = bishop
-        bishop = Bishop("bishop", "white", "f1")
-        self._board[0][5] = bishop
-        self._chess_pieces[bishop.get_coordinates()] = bishop
-        bishop = Bishop("bishop", "black", "c8")
-        self._board[7][2] = bishop
-        self._chess_pieces[bishop.get_coordinates()] = bishop
-        bishop = Bishop("bishop", "black", "f8")
-        self._board[7][5] = bishop
-        self._chess_pieces[bishop.get_coordinates()] = bishop
-
-        # initialize knights
-        knight = Knight("knight", "white", "b1")
-        self._board[0][1] = knight
-        self._chess_pieces[knight.get_coordinates()] = knight
-        knight = Knight("knight", "white", "g1")
-        self._board[0][6] = knight
-        self._chess_pieces[knight.get_coordinates()] = knight
-        knight = Knight("knight", "black", "b8")
-        self._board[7][1] = knight
-        self._chess_pieces[knight.get_coordinates()] = knight
-        knight = Knight("knight", "black", "g8")
-        self._board[7][6] = knight
-        self._chess_pieces[knight.get_coordinates()] = knight
-
-        # initialize queens
-        queen = Queen("queen", "white", "d1")
-        self._board[0][3] = queen
-        self._chess_pieces[queen.get_coordinates()] = queen
-        queen = Queen("queen", "black", "d8")
-        self._board[7][3] = queen
-        self._chess_pieces[queen.get_coordinates()] = queen
-
-        # initialize kings
-        king = King("king", "white", "e1")
-        self._board[0][4] = king
-        self._chess_pieces[king.get_coordinates()] = king
-        king = King("king", "black", "e8")
-        self._board[7][4] = king
-        self._chess_pieces[king.get_coordinates()] = king
+                self.add_piece(color * 6 + PAWN, row_index * 8 + col)
 
-    def print_board(self) -> None:
-        """Prints a display of the current state of the game board."""
-        print("  a", "b", "c", "d", "e", "f", "g", "h")
+        # initialize rooks, bishops, knights, queens, and kings
+        back_rank = ((ROOK, (0, 7)), (BISHOP, (2, 5)), (KNIGHT, (1, 6)), (QUEEN, (3,)), (KING, (4,)))
+        for piece_type, columns in back_rank:
+            for color, row_index in ((WHITE, 0), (BLACK, 7)):
+                for col in columns:
+                    self.add_piece(color * 6 + piece_type, row_index * 8 + col)
+
+    def add_piece(self, piece_code: int, square: int) -> None:
+        """Places a new chess piece on an empty square.
+        Pawns are placed as not having made their first move.
+
+        Args:
+            piece_code: An integer combining the color and piece type as color * 6 + piece type
+            square: An integer from 0 (a1) to 63 (h8)
+        """
+        self._set_bit(piece_code, square)
+        if piece_code % 6 == PAWN:
+            self._unmoved_pawns |= 1 << square
+            self._zobrist_key ^= ZOBRIST_UNMOVED_PAWNS[square]
+        if self._board is not None:
+            self._place_object(piece_code, square)
+
+    def _place_object(self, piece_code: int, square: int) -> "ChessPiece":
+        """Creates the ChessPiece instance of the piece code and puts it on the board and chess pieces dictionary"""
+        coordinates = SQUARE_NAMES[square]
+        piece_type = piece_code % 6
+        chess_piece = PIECE_CLASSES[piece_type](PIECE_NAMES[piece_type], COLOR_NAMES[piece_code // 6], coordinates)
+        self._board[square // 8][square % 8] = chess_piece
+        self._chess_pieces[coordinates] = chess_piece
+        return chess_piece
+
+    def _set_bit(self, piece_code: int, square: int) -> None:
+        """Adds the square to the bitboards of the piece code"""
+        bit = 1 << square
+        self._piece_bitboards[piece_code] |= bit
+        self._color_bitboards[piece_code // 6] |= bit
+        self._occupied |= bit
+        self._legal_moves = None
+        self._dirty_squares |= bit
+        self._move_dirty_squares |= bit
+        self._zobrist_key ^= ZOBRIST_PIECES[piece_code][square]
+
+    def _clear_bit(self, piece_code: int, square: int) -> None:
+        """Removes the square from the bitboards of the piece code"""
+        mask = ~(1 << square)
+        self._piece_bitboards[piece_code] &= mask
+        self._color_bitboards[piece_code // 6] &= mask
+        self._occupied &= mask
+        if self._unmoved_pawns >> square & 1:
+            self._unmoved_pawns &= mask
+            self._zobrist_key ^= ZOBRIST_UNMOVED_PAWNS[square]
+        self._legal_moves = None
+        self._dirty_squares |= 1 << square
+        self._move_dirty_squares |= 1 << square
+        self._zobrist_key ^= ZOBRIST_PIECES[piece_code][square]
+
+    def _set_position(self, piece_codes: list[int], unmoved_pawns: int, current_player: str,
+                      game_state: str) -> None:
+        """Replaces the position and clears the move history.
+
+        Args:
+            piece_codes: A list of the piece codes of the 64 squares, -1 for empty squares
+            unmoved_pawns: A bitboard of the pawns that have not made their first move
+            current_player: "white" or "black"
+            game_state: One of GAME_STATES
+        """
+        if current_player not in COLOR_NAMES:
+            raise ValueError(f"Unknown player: {current_player}")
+        if game_state not in GAME_STATES:
+            raise ValueError(f"Unknown game state: {game_state}")
+        self._piece_bitboards = [0] * 12
+        self._color_bitboards = [0, 0]
+        self._occupied = 0
+        self._unmoved_pawns = 0
+        self._zobrist_key = 0
+        self._undo_stack = []
+        self._legal_moves = None
+        self._piece_attacks = None
+        self._dirty_squares = 0
+        self._attack_maps = None
+        self._move_cache = None
+        self._move_dirty_squares = 0
+        if self._board is not None:
+            self._board = [[" "] * self._columns for _ in range(self._rows)]
+            self._chess_pieces = {}
+        for square, piece_code in enumerate(piece_codes):
+            if piece_code >= 0:
+                self.add_piece(piece_code, square)
+        # add_piece places every pawn as unmoved
+        for square in bitboard_squares(self._unmoved_pawns & ~unmoved_pawns):
+            self._unmoved_pawns &= ~(1 << square)
+            self._zobrist_key ^= ZOBRIST_UNMOVED_PAWNS[square]
+            if self._chess_pieces is not None:
+                self._chess_pieces[SQUARE_NAMES[square]].set_first_move(False)
+        self._current_player = current_player
+        if current_player == "black":
+            self._zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        self._game_state = game_state
+
+    def snapshot(self) -> tuple:
+        """Returns the state of the game as a flat tuple of immutable values, including the moves
+        that can be taken back. A snapshot can be kept, shared between games of either representation,
+        and restored any number of times.
+        """
+        return (
+            tuple(self._piece_bitboards), self._color_bitboards[WHITE], self._color_bitboards[BLACK], self._occupied,
+            self._unmoved_pawns, self._current_player, self._game_state, self._zobrist_key,
+            tuple(self._undo_stack), self._legal_moves,
+        )
+
+    def restore(self, snapshot: tuple) -> None:
+        """Puts the game back into the state of a snapshot, see snapshot."""
+        (piece_bitboards, white_pieces, black_pieces, self._occupied, self._unmoved_pawns, self._current_player,
+         self._game_state, self._zobrist_key, undo_stack, self._legal_moves) = snapshot
+        self._piece_bitboards = list(piece_bitboards)
+        self._color_bitboards = [white_pieces, black_pieces]
+        self._undo_stack = list(undo_stack)
+        self._piece_attacks = None
+        self._dirty_squares = 0
+        self._attack_maps = None
+        self._move_cache = None
+        self._move_dirty_squares = 0
+        if self._board is not None:
+            self._board = [[" "] * self._columns for _ in range(self._rows)]
+            self._chess_pieces = {}
+            for piece_code in range(12):
+                for square in bitboard_squares(piece_bitboards[piece_code]):
+                    chess_piece = self._place_object(piece_code, square)
+                    if piece_code % 6 == PAWN and not self._unmoved_pawns >> square & 1:
+                        chess_piece.set_first_move(False)
+
+    def clone(self) -> "ChessVar":
+        """Returns an independent copy of the game in the same representation, including its move history."""
+        game = ChessVar.__new__(ChessVar)
+        game._representation = self._representation
+        game._rows = self._rows
+        game._columns = self._columns
+        game._board = None if self._board is None else []
+        game._chess_pieces = None if self._chess_pieces is None else {}
+        game._players = dict(self._players)
+        game.restore(self.snapshot())
+        return game
+
+    def reset(self) -> None:
+        """Puts the game back into the starting position without a move history."""
+        self.restore(STARTING_SNAPSHOT)
+
+    def get_zobrist_key(self) -> int:
+        """Returns the 64-bit zobrist key of the position, including the current player and unmoved pawns."""
+        return self._zobrist_key
+
+    def compute_zobrist_key(self) -> int:
+        """Computes the zobrist key of the position from scratch.
+        Matches get_zobrist_key unless the incremental updates have gone wrong.
+        """
+        zobrist_key = ZOBRIST_BLACK_TO_MOVE if self._current_player == "black" else 0
+        for piece_code in range(12):
+            for square in bitboard_squares(self._piece_bitboards[piece_code]):
+                zobrist_key ^= ZOBRIST_PIECES[piece_code][square]
+        for square in bitboard_squares(self._unmoved_pawns):
+            zobrist_key ^= ZOBRIST_UNMOVED_PAWNS[square]
+        return zobrist_key
+
+    def piece_code_at(self, square: int) -> int:
+        """Returns the piece code on the square, or -1 if the square is empty."""
+        bit = 1 << square
+        if not self._occupied & bit:
+            return -1
+        first_code = 0 if self._color_bitboards[WHITE] & bit else 6
+        for piece_code in range(first_code, first_code + 6):
+            if self._piece_bitboards[piece_code] & bit:
+                return piece_code
+        return -1
+
+    def board_string(self) -> str:
+        """Returns the display of the game board that print_board prints, as lines joined by newlines."""
+        lines = ["  a b c d e f g h"]
         for row in range(self._rows, 0, -1):
-            print(str(row) + " ", end="")
+            squares = []
             for col in range(self._columns):
-                square = self._board[row - 1][col]
-                print(square if isinstance(square, str) else square.get_unicode(), end="")
-                if col < self._rows:
-                    print("|", end="")
-            if row <= self._rows:
-                print()
+                piece_code = self.piece_code_at((row - 1) * 8 + col)
+                squares.append(" " if piece_code < 0 else PIECE_UNICODE[piece_code])
+            lines.append(str(row) + " " + "|".join(squares) + "|")
+        return "\n".join(lines)
+
+    def print_board(self) -> None:
+        """Prints a display of the current state of the game board."""
+        print(self.board_string())
 
     def get_game_state(self) -> str:
         """Returns the game state to indicate if the game is unfinished or if black or white has won."""
         return self._game_state
 
+    def get_current_player(self) -> str:
+        """Returns the color of the current player, "white" or "black"."""
+        return self._current_player
+
+    def get_piece_bitboards(self) -> tuple[int, ...]:
+        """Returns the 12 piece bitboards of the position, indexed by piece code."""
+        return tuple(self._piece_bitboards)
+
+    def get_move_history(self) -> tuple[int, ...]:
+        """Returns the packed moves made with make_move or push_move that can be taken back, oldest first."""
+        return tuple(undo_record[0] for undo_record in self._undo_stack)
+
+    def get_unmoved_pawns(self) -> int:
+        """Returns a bitboard of the pawns that have not made their first move yet."""
+        return self._unmoved_pawns
+
+    def get_board(self) -> Optional[list[list[Union[str, "ChessPiece"]]]]:
+        """Returns the board list of lists, or None if the representation is "bitboards"."""
+        return self._board
+
+    def get_chess_pieces(self) -> Optional[dict[str, "ChessPiece"]]:
+        """Returns the chess pieces dictionary, or None if the representation is "bitboards"."""
+        return self._chess_pieces
+
+    def to_fen(self) -> str:
+        """Returns the position as an atomic FEN string, see STARTING_FEN."""
+        ranks = []
+        for row in range(self._rows - 1, -1, -1):
+            rank = ""
+            empty_squares = 0
+            for col in range(self._columns):
+                piece_code = self.piece_code_at(row * 8 + col)
+                if piece_code < 0:
+                    empty_squares += 1
+                    continue
+                if empty_squares:
+                    rank += str(empty_squares)
+                    empty_squares = 0
+                rank += FEN_PIECES[piece_code]
+            if empty_squares:
+                rank += str(empty_squares)
+            ranks.append(rank)
+        unmoved_pawns = "".join(SQUARE_NAMES[square] for square in bitboard_squares(self._unmoved_pawns)) or "-"
+        return f"{'/'.join(ranks)} {self._current_player[0]} {unmoved_pawns} {self._game_state}"
+
+    @classmethod
+    def from_fen(cls, fen: str, representation: str = "objects") -> "ChessVar":
+        """Returns a new game in the position of an atomic FEN string, see STARTING_FEN.
+
+        Raises:
+            ValueError: If the string is not a valid atomic FEN string
+        """
+        fields = fen.split()
+        if len(fields) != 4:
+            raise ValueError(f"Expected 4 fields in the FEN string: {fen}")
+        placement, player, unmoved_field, game_state = fields
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            raise ValueError(f"Expected 8 ranks in the FEN string: {fen}")
+        piece_codes = [-1] * 64
+        for rank_index, rank in enumerate(ranks):
+            row = 7 - rank_index
+            col = 0
+            for character in rank:
+                if character.isdigit():
+                    col += int(character)
+                elif character in FEN_PIECES and col < 8:
+                    piece_codes[row * 8 + col] = FEN_PIECES.index(character)
+                    col += 1
+                else:
+                    raise ValueError(f"Invalid rank in the FEN string: {rank}")
+            if col != 8:
+                raise ValueError(f"Invalid rank in the FEN string: {rank}")
+        if player not in ("w", "b"):
+            raise ValueError(f"Invalid player in the FEN string: {player}")
+        unmoved_pawns = 0
+        if unmoved_field != "-":
+            for index in range(0, len(unmoved_field), 2):
+                square = SQUARE_INDEXES.get(unmoved_field[index:index + 2])
+                if square is None or piece_codes[square] % 6 != PAWN:
+                    raise ValueError(f"Invalid unmoved pawns in the FEN string: {unmoved_field}")
+                unmoved_pawns |= 1 << square
+        game = cls(representation)
+        game._set_position(piece_codes, unmoved_pawns, "white" if player == "w" else "black", game_state)
+        return game
+
+    def to_bytes(self) -> bytes:
+        """Returns the position in the binary format of POSITION_BYTES bytes.
+
+        Raises:
+            ValueError: If there are more than 32 pieces on the board
+        """
+        squares = bitboard_squares(self._occupied)
+        if len(squares) > 32:
+            raise ValueError("The binary position format holds at most 32 pieces")
+        nibbles = bytearray(16)
+        for index, square in enumerate(squares):
+            piece_code = self.piece_code_at(square)
+            if self._unmoved_pawns >> square & 1:
+                piece_code = UNMOVED_PAWN_CODE + piece_code // 6
+            nibbles[index >> 1] |= piece_code << (index & 1) * 4
+        header = (self._current_player == "black") | GAME_STATES.index(self._game_state) << 1
+        return bytes((header,)) + self._occupied.to_bytes(8, "little") + bytes(nibbles)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, representation: str = "objects") -> "ChessVar":
+        """Returns a new game in the position of the binary format, see to_bytes.
+
+        Raises:
+            ValueError: If the data is not a valid binary position
+        """
+        if len(data) != POSITION_BYTES:
+            raise ValueError(f"Expected {POSITION_BYTES} bytes, not {len(data)}")
+        header = data[0]
+        if header >> 1 >= len(GAME_STATES):
+            raise ValueError(f"Invalid binary position header: {header}")
+        occupied = int.from_bytes(data[1:9], "little")
+        squares = bitboard_squares(occupied)
+        if len(squares) > 32:
+            raise ValueError("The binary position format holds at most 32 pieces")
+        piece_codes = [-1] * 64
+        unmoved_pawns = 0
+        for index, square in enumerate(squares):
+            piece_code = data[9 + (index >> 1)] >> (index & 1) * 4 & 15
+            if piece_code >= UNMOVED_PAWN_CODE:
+                if piece_code > UNMOVED_PAWN_CODE + 1:
+                    raise ValueError(f"Invalid piece code in the binary position: {piece_code}")
+                piece_code = (piece_code - UNMOVED_PAWN_CODE) * 6 + PAWN
+                unmoved_pawns |= 1 << square
+            piece_codes[square] = piece_code
+        game = cls(representation)
+        game._set_position(piece_codes, unmoved_pawns, COLOR_NAMES[header & 1], GAME_STATES[header >> 1])
+        return game
+
     def create_player(self, player_name: str, color: str) -> None:
         """Creates a Player instance and stores it in the players dictionary."""
         player = Player(player_name, color)
@@ -204,10 +803,249 @@ class ChessVar:
             self._current_player = "black"
         else:
             self._current_player = "white"
+        self._legal_moves = None
+        self._zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+
+    def legal_moves(self) -> tuple[int, ...]:
+        """Returns every move that make_move would accept for the current player.
+        The moves are packed integers, see encode_move, and are cached until the position changes.
+
+        Returns:
+            A tuple of packed moves, empty if the game is over
+        """
+        if self._legal_moves is None:
+            self._legal_moves = self.generate_legal_moves()
+        return self._legal_moves
+
+    def generate_legal_moves(self) -> tuple[int, ...]:
+        """Generates the packed legal moves of the current player, bypassing the legal moves cache.
+        The moves of each piece come from the move cache, see _update_move_cache, when nothing they depend on
+        has changed since they were generated.
+        """
+        if self._game_state != "UNFINISHED":
+            return ()
+        self._update_move_cache()
+        move_cache = self._move_cache
+        color = WHITE if self._current_player == "white" else BLACK
+        piece_bitboards = self._piece_bitboards
+        legal_moves = []
+        for piece_code in range(color * 6, color * 6 + 6):
+            for from_square in bitboard_squares(piece_bitboards[piece_code]):
+                cached = move_cache.get(from_square)
+                if cached is None:
+                    cached = move_cache[from_square] = self._generate_piece_moves(piece_code, from_square)
+                legal_moves.extend(cached[0])
+        return tuple(legal_moves)
+
+    def _generate_piece_moves(self, piece_code: int, from_square: int) -> tuple[tuple[int, ...], int]:
+        """Generates the packed legal moves of one piece from the bitboards.
+
+        Returns:
+            A tuple of the moves and a bitboard of the squares they depend on: the square of the piece,
+            every square whose occupancy changes its targets, and the explosion squares of its captures
+        """
+        piece_bitboards = self._piece_bitboards
+        occupied = self._occupied
+        color = piece_code // 6
+        own_pieces = self._color_bitboards[color]
+        opposing_pieces = self._color_bitboards[1 - color]
+        pawns = piece_bitboards[PAWN] | piece_bitboards[6 + PAWN]
+        kings = piece_bitboards[KING] | piece_bitboards[6 + KING]
+        first_move = bool(self._unmoved_pawns >> from_square & 1)
+        piece_type = piece_code % 6
+        if piece_type == PAWN:
+            dependencies = (PAWN_PUSHES[color][from_square] | PAWN_DOUBLE_PUSHES[color][from_square]
+                            | PAWN_ATTACKS[color][from_square])
+        elif piece_type == KNIGHT:
+            dependencies = KNIGHT_ATTACKS[from_square]
+        elif piece_type == KING:
+            dependencies = KING_ATTACKS[from_square]
+        else:
+            # a sliding piece depends on its rays up to and including the nearest blockers
+            dependencies = piece_attacks(piece_code, from_square, occupied)
+        dependencies |= 1 << from_square
+        targets = piece_targets(piece_code, from_square, occupied, own_pieces, first_move)
+        moves = []
+        for to_square in bitboard_squares(targets):
+            to_bit = 1 << to_square
+            flags = 0
+            if opposing_pieces & to_bit:
+                flags = MOVE_CAPTURE
+                dependencies |= EXPLOSION_MASKS[to_square]
+                removed = EXPLOSION_MASKS[to_square] & occupied & ~pawns | to_bit | 1 << from_square
+                kings_killed = removed & kings
+                if kings_killed:
+                    # a capture that destroys both kings is not allowed
+                    if kings_killed & (kings_killed - 1):
+                        continue
+                    flags |= MOVE_KILLS_KING
+            elif first_move and (to_square - from_square == 16 or from_square - to_square == 16):
+                flags = MOVE_DOUBLE_STEP
+            moves.append(from_square | to_square << 6 | flags << 12)
+        return tuple(moves), dependencies
+
+    def _update_move_cache(self) -> None:
+        """Drops the cached moves of every piece that depends on a square changed since the last update.
+        The moves of the other pieces are still the same and are kept.
+        """
+        if self._move_cache is None:
+            self._move_cache = {}
+        elif self._move_dirty_squares:
+            dirty_squares = self._move_dirty_squares
+            move_cache = self._move_cache
+            for square in [square for square, (_, dependencies) in move_cache.items() if dependencies & dirty_squares]:
+                del move_cache[square]
+        self._move_dirty_squares = 0
+
+    def _update_attacks(self) -> None:
+        """Brings the attack bitboards of the pieces up to date with the squares changed since the last query.
+        Pieces on changed squares were removed or placed. A sliding piece whose attacks reach a changed square
+        now stops earlier or sees further, and every other piece attacks the same squares as before.
+        """
+        attacks_by_square = self._piece_attacks
+        dirty_squares = self._dirty_squares
+        if attacks_by_square is None:
+            attacks_by_square = self._piece_attacks = {}
+            dirty_squares = self._occupied
+        elif not dirty_squares:
+            return
+        piece_bitboards = self._piece_bitboards
+        occupied = self._occupied
+        sliders = 0
+        for piece_type in (BISHOP, ROOK, QUEEN):
+            sliders |= piece_bitboards[piece_type] | piece_bitboards[6 + piece_type]
+        for square in list(attacks_by_square):
+            if dirty_squares >> square & 1:
+                del attacks_by_square[square]
+            elif sliders >> square & 1 and attacks_by_square[square] & dirty_squares:
+                attacks_by_square[square] = piece_attacks(self.piece_code_at(square), square, occupied)
+        for square in bitboard_squares(occupied & dirty_squares):
+            attacks_by_square[square] = piece_attacks(self.piece_code_at(square), square, occupied)
+        self._dirty_squares = 0
+        self._attack_maps = None
+
+    def attack_map(self, color: str) -> int:
+        """Returns a bitboard of the squares the pieces of the color could capture on, whatever occupies them.
+        The attacks of every piece are kept between calls and only recomputed for the squares a move
+        or explosion has changed.
+
+        Args:
+            color: "white" or "black"
+        """
+        self._update_attacks()
+        if self._attack_maps is None:
+            attack_maps = [0, 0]
+            white_pieces = self._color_bitboards[WHITE]
+            for square, attacks in self._piece_attacks.items():
+                attack_maps[WHITE if white_pieces >> square & 1 else BLACK] |= attacks
+            self._attack_maps = attack_maps
+        return self._attack_maps[COLOR_NAMES.index(color)]
+
+    def is_square_attacked(self, square: int, color: str) -> bool:
+        """Returns true if a piece of the color could capture on the square, see attack_map."""
+        return bool(self.attack_map(color) >> square & 1)
+
+    def attackers_of(self, square: int, color: str) -> int:
+        """Returns a bitboard of the pieces of the color that could capture on the square."""
+        self._update_attacks()
+        bit = 1 << square
+        attackers = 0
+        for from_square in bitboard_squares(self._color_bitboards[COLOR_NAMES.index(color)]):
+            if self._piece_attacks[from_square] & bit:
+                attackers |= 1 << from_square
+        return attackers
+
+    def king_capture_moves(self) -> tuple[int, ...]:
+        """Returns the legal moves of the current player that blow up the opposing king,
+        found from the attack maps without generating the other moves.
+        legal_moves also flags MOVE_KILLS_KING on captures that blow up only the own king,
+        which win the game as well but are not returned here.
+        """
+        if self._game_state != "UNFINISHED":
+            return ()
+        color = WHITE if self._current_player == "white" else BLACK
+        opposing_king = self._piece_bitboards[6 * (1 - color) + KING]
+        if not opposing_king:
+            return ()
+        # captures on the king or next to it, unless the explosion also reaches the own king
+        targets = EXPLOSION_MASKS[opposing_king.bit_length() - 1] & self._color_bitboards[1 - color]
+        own_king = self._piece_bitboards[6 * color + KING]
+        if own_king:
+            targets &= ~EXPLOSION_MASKS[own_king.bit_length() - 1]
+        targets &= self.attack_map(COLOR_NAMES[color])
+        flags = (MOVE_CAPTURE | MOVE_KILLS_KING) << 12
+        moves = []
+        for to_square in bitboard_squares(targets):
+            for from_square in bitboard_squares(self.attackers_of(to_square, COLOR_NAMES[color])):
+                moves.append(from_square | to_square << 6 | flags)
+        return tuple(moves)
+
+    def kings_adjacent(self) -> bool:
+        """Returns true if the kings stand next to each other. Neither king can then be captured directly,
+        because the explosion would destroy both kings.
+        """
+        white_king = self._piece_bitboards[KING]
+        black_king = self._piece_bitboards[6 + KING]
+        return bool(white_king and KING_ATTACKS[white_king.bit_length() - 1] & black_king)
+
+    def check_move(self, from_square: int, to_square: Optional[int]) -> int:
+        """Checks a move the way make_move does, without making it or printing any messages.
+
+        Args:
+            from_square: An integer square of the piece to move
+            to_square: An integer square to move the piece to, or None for coordinates off the board
+        Returns:
+            MOVE_ACCEPTED, or the REJECT code of the first check make_move would fail
+        """
+        piece_code = self.piece_code_at(from_square)
+        if piece_code < 0:
+            return REJECT_NO_PIECE
+        color = piece_code // 6
+        if COLOR_NAMES[color] != self._current_player:
+            return REJECT_WRONG_COLOR
+        first_move = bool(self._unmoved_pawns >> from_square & 1)
+        if to_square is None or not is_piece_target(
+            piece_code, from_square, to_square, self._occupied, self._color_bitboards[color], first_move
+        ):
+            return REJECT_ILLEGAL_GEOMETRY
+        if self._game_state != "UNFINISHED":
+            return REJECT_GAME_OVER
+        if self._color_bitboards[1 - color] >> to_square & 1:
+            piece_bitboards = self._piece_bitboards
+            pawns = piece_bitboards[PAWN] | piece_bitboards[6 + PAWN]
+            removed = EXPLOSION_MASKS[to_square] & self._occupied & ~pawns | 1 << to_square | 1 << from_square
+            kings_killed = removed & (piece_bitboards[KING] | piece_bitboards[6 + KING])
+            if kings_killed & (kings_killed - 1):
+                return REJECT_BOTH_KINGS
+        return MOVE_ACCEPTED
+
+    def apply_moves(self, moves: Sequence[Union[int, tuple[str, str]]]) -> AppliedMoves:
+        """Makes a sequence of moves without printing any messages, stopping at the first rejected move.
+        Each move is checked like make_move checks it and can be taken back with unmake_move.
+
+        Args:
+            moves: Packed moves, or (move_from, move_to) algebraic coordinate pairs
+        Returns:
+            An AppliedMoves of the number of moves made and the index and reason of the first rejected move
+        """
+        for index, move in enumerate(moves):
+            if isinstance(move, int):
+                from_square = move & 63
+                to_square = move >> 6 & 63
+            else:
+                from_square = SQUARE_INDEXES.get(move[0])
+                to_square = SQUARE_INDEXES.get(move[1])
+                if from_square is None:
+                    return AppliedMoves(index, index, REJECT_NO_PIECE)
+            reason = self.check_move(from_square, to_square)
+            if reason != MOVE_ACCEPTED:
+                return AppliedMoves(index, index, reason)
+            self.push_move(encode_move(from_square, to_square, self._move_flags(from_square, to_square)))
+        return AppliedMoves(len(moves), None, MOVE_ACCEPTED)
 
     def is_valid_move(self, chess_piece: "ChessPiece", move_to: str) -> bool:
         """Checks if the move_to coordinates are valid for the chess piece.
-        Uses ChessPiece subclasses to get the possible moves.
+        Uses the precomputed move tables and the bitboards of the board.
 
         Args:
             chess_piece: The ChessPiece instance that we are checking if the move is valid for
@@ -215,11 +1053,14 @@ class ChessVar:
         Returns:
             A boolean to indicate if the move_to square is a valid move
         """
-        possible_moves = chess_piece.possible_moves(self._board)
-        if move_to in possible_moves:
-            return True
-        else:
+        to_square = SQUARE_INDEXES.get(move_to)
+        if to_square is None:
             return False
+        piece_code = chess_piece.get_piece_code()
+        return is_piece_target(
+            piece_code, chess_piece.get_square(), to_square, self._occupied,
+            self._color_bitboards[piece_code // 6], chess_piece.is_first_move()
+        )
 
     def update_board(self, move_from: str, move_to: str) -> None:
         """Updates board with newly made move"""
@@ -227,21 +1068,22 @@ class ChessVar:
         self._board[current_position[0]][current_position[1]] = " "
         new_position = convert_coordinates_to_board_index(move_to)
         self._board[new_position[0]][new_position[1]] = self._chess_pieces[move_to]
+        # update bitboards with move
+        from_square = SQUARE_INDEXES[move_from]
+        to_square = SQUARE_INDEXES[move_to]
+        replaced_code = self.piece_code_at(to_square)
+        if replaced_code >= 0:
+            self._clear_bit(replaced_code, to_square)
+        piece_code = self.piece_code_at(from_square)
+        self._clear_bit(piece_code, from_square)
+        self._set_bit(piece_code, to_square)
 
     def both_kings_killed(self, captured_piece: "ChessPiece") -> bool:
         """Checks if a move would kill both kings in one step"""
-        kings_killed = 0
-        for square in self.get_surrounding_squares(captured_piece):
-            square_is_occupied = (self._board[square[0]][square[1]] != " ")
-            if square_is_occupied:
-                if self._board[square[0]][square[1]].get_name() == "king":
-                    kings_killed += 1
-        if captured_piece.get_name() == "king":
-            kings_killed += 1
-        if kings_killed > 1:
-            return True
-        else:
-            return False
+        square = captured_piece.get_square()
+        kings = self._piece_bitboards[KING] | self._piece_bitboards[6 + KING]
+        kings_killed = EXPLOSION_MASKS[square] & kings
+        return kings_killed & (kings_killed - 1) != 0
 
     def remove_battle_pieces(self, attacking_piece: "ChessPiece", captured_piece: "ChessPiece") -> None:
         """Removes attacking and captured pieces"""
@@ -250,11 +1092,15 @@ class ChessVar:
         self._board[attacking_piece_position[0]][attacking_piece_position[1]] = " "
         coordinates = attacking_piece.get_coordinates()
         del self._chess_pieces[coordinates]
+        square = SQUARE_INDEXES[coordinates]
+        self._clear_bit(self.piece_code_at(square), square)
 
         # remove captured piece
         captured_piece_position = convert_coordinates_to_board_index(captured_piece.get_coordinates())
         self._board[captured_piece_position[0]][captured_piece_position[1]] = " "
         coordinates = captured_piece.get_coordinates()
+        square = SQUARE_INDEXES[coordinates]
+        self._clear_bit(self.piece_code_at(square), square)
 
         # if king is captured
         if self._chess_pieces[coordinates].get_name() == "king":
@@ -267,55 +1113,193 @@ class ChessVar:
     @staticmethod
     def get_surrounding_squares(captured_piece) -> list[list[int]]:
         """Returns a list of the surrounding squares of the captured piece"""
-        surrounding_squares = []
-        captured_piece_position = convert_coordinates_to_board_index(captured_piece.get_coordinates())
-        # top 3 squares
-        if captured_piece_position[1] - 1 >= 0 and captured_piece_position[0] + 1 < 8:
-            surrounding_squares.append([captured_piece_position[0] + 1, captured_piece_position[1] - 1])
-        if captured_piece_position[0] + 1 < 8:
-            surrounding_squares.append([captured_piece_position[0] + 1, captured_piece_position[1]])
-        if captured_piece_position[0] + 1 < 8 and captured_piece_position[1] + 1 < 8:
-            surrounding_squares.append([captured_piece_position[0] + 1, captured_piece_position[1] + 1])
-        # bottom 3 squares
-        if captured_piece_position[0] - 1 >= 0 and captured_piece_position[1] - 1 >= 0:
-            surrounding_squares.append([captured_piece_position[0] - 1, captured_piece_position[1] - 1])
-        if captured_piece_position[0] - 1 >= 0:
-            surrounding_squares.append([captured_piece_position[0] - 1, captured_piece_position[1]])
-        if captured_piece_position[0] - 1 >= 0 and captured_piece_position[1] + 1 < 8:
-            surrounding_squares.append([captured_piece_position[0] - 1, captured_piece_position[1] + 1])
-        # left square
-        if captured_piece_position[1] - 1 >= 0:
-            surrounding_squares.append([captured_piece_position[0], captured_piece_position[1] - 1])
-        # right square
-        if captured_piece_position[1] + 1 < 8:
-            surrounding_squares.append([captured_piece_position[0], captured_piece_position[1] + 1])
-        return surrounding_squares
+        square = captured_piece.get_square()
+        return [[surrounding // 8, surrounding % 8] for surrounding in SURROUNDING_SQUARES[square]]
+
+    def resolve_capture(self, from_square: int, to_square: int,
+                        announce_winner: bool = True) -> Optional[tuple[int, ...]]:
+        """Resolves the capture of the piece on to_square by the piece on from_square in one pass.
+        Removes the attacking piece, the captured piece, and every non-pawn piece around the captured piece.
+        If a king is destroyed, the current player wins the game.
+
+        Args:
+            from_square: An integer square of the attacking piece
+            to_square: An integer square of the captured piece
+            announce_winner: A boolean to print the winner when a king explodes, as remove_exploded_pieces does
+        Returns:
+            None, without changing the board, if the explosion would destroy both kings,
+            otherwise a tuple of the removed pieces packed as piece_code << 6 | square
+        """
+        piece_bitboards = self._piece_bitboards
+        pawns = piece_bitboards[PAWN] | piece_bitboards[6 + PAWN]
+        removed = EXPLOSION_MASKS[to_square] & self._occupied & ~pawns | 1 << to_square | 1 << from_square
+        kings_killed = removed & (piece_bitboards[KING] | piece_bitboards[6 + KING])
+        if kings_killed & (kings_killed - 1):
+            return None
+
+        # remove the attacking, captured, and exploded pieces
+        removed_pieces = []
+        zobrist_key = self._zobrist_key
+        kept = ~removed
+        for piece_code in range(12):
+            captured = piece_bitboards[piece_code] & removed
+            if captured:
+                for square in bitboard_squares(captured):
+                    removed_pieces.append(piece_code << 6 | square)
+                    zobrist_key ^= ZOBRIST_PIECES[piece_code][square]
+                piece_bitboards[piece_code] &= kept
+        for square in bitboard_squares(self._unmoved_pawns & removed):
+            zobrist_key ^= ZOBRIST_UNMOVED_PAWNS[square]
+        self._zobrist_key = zobrist_key
+        self._color_bitboards[WHITE] &= kept
+        self._color_bitboards[BLACK] &= kept
+        self._occupied &= kept
+        self._unmoved_pawns &= kept
+        self._legal_moves = None
+        self._dirty_squares |= removed
+        self._move_dirty_squares |= removed
+        if self._board is not None:
+            for square in bitboard_squares(removed):
+                self._board[square // 8][square % 8] = " "
+                del self._chess_pieces[SQUARE_NAMES[square]]
+
+        # if a king is captured or exploding
+        if kings_killed:
+            self._game_state = "WHITE_WON" if self._current_player == "white" else "BLACK_WON"
+            if announce_winner and kings_killed != 1 << to_square:
+                self.return_winner()
+        return tuple(removed_pieces)
+
+    def _move_piece(self, from_square: int, to_square: int) -> tuple[int, ...]:
+        """Moves the piece on from_square to to_square without a capture.
+        A piece of the same color on to_square is replaced.
+
+        Returns:
+            A tuple of the replaced piece packed as piece_code << 6 | square, or an empty tuple
+        """
+        removed_pieces = ()
+        replaced_code = self.piece_code_at(to_square)
+        if replaced_code >= 0:
+            self._clear_bit(replaced_code, to_square)
+            removed_pieces = (replaced_code << 6 | to_square,)
+        piece_code = self.piece_code_at(from_square)
+        self._clear_bit(piece_code, from_square)
+        self._set_bit(piece_code, to_square)
+        if self._board is not None:
+            chess_piece = self._board[from_square // 8][from_square % 8]
+            self._board[from_square // 8][from_square % 8] = " "
+            self._board[to_square // 8][to_square % 8] = chess_piece
+            del self._chess_pieces[SQUARE_NAMES[from_square]]
+            self._chess_pieces[SQUARE_NAMES[to_square]] = chess_piece
+            chess_piece.set_square(to_square)
+        return removed_pieces
+
+    def push_move(self, move: int) -> None:
+        """Makes a packed move from legal_moves without checking it and without printing any messages.
+        The move can be taken back with unmake_move.
+
+        Args:
+            move: A packed move returned by legal_moves
+        """
+        from_square = move & 63
+        to_square = move >> 6 & 63
+        unmoved_pawns = self._unmoved_pawns
+        game_state = self._game_state
+        if move >> 12 & MOVE_CAPTURE:
+            removed_pieces = self.resolve_capture(from_square, to_square, announce_winner=False)
+        else:
+            removed_pieces = self._move_piece(from_square, to_square)
+        self._undo_stack.append((move, removed_pieces, unmoved_pawns, game_state))
+        self.switch_turns()
+
+    def unmake_move(self) -> bool:
+        """Takes back the last move made with make_move or push_move,
+        restoring every piece removed by the move and its explosion, the turn, and the game state.
+
+        Returns:
+            False if there is no move to take back, otherwise True
+        """
+        if not self._undo_stack:
+            return False
+        move, removed_pieces, unmoved_pawns, game_state = self._undo_stack.pop()
+        from_square = move & 63
+        to_square = move >> 6 & 63
+
+        # move the piece back unless it was destroyed in the capture
+        if not move >> 12 & MOVE_CAPTURE:
+            piece_code = self.piece_code_at(to_square)
+            self._clear_bit(piece_code, to_square)
+            self._set_bit(piece_code, from_square)
+            if self._board is not None:
+                chess_piece = self._board[to_square // 8][to_square % 8]
+                self._board[to_square // 8][to_square % 8] = " "
+                self._board[from_square // 8][from_square % 8] = chess_piece
+                del self._chess_pieces[SQUARE_NAMES[to_square]]
+                self._chess_pieces[SQUARE_NAMES[from_square]] = chess_piece
+                chess_piece.set_square(from_square)
+                if piece_code % 6 == PAWN:
+                    chess_piece.set_first_move(bool(unmoved_pawns >> from_square & 1))
+
+        # put back the removed pieces
+        for removed_piece in removed_pieces:
+            piece_code, square = removed_piece >> 6, removed_piece & 63
+            self._set_bit(piece_code, square)
+            if self._board is not None:
+                chess_piece = self._place_object(piece_code, square)
+                if piece_code % 6 == PAWN:
+                    chess_piece.set_first_move(bool(unmoved_pawns >> square & 1))
+
+        for square in bitboard_squares(self._unmoved_pawns ^ unmoved_pawns):
+            self._zobrist_key ^= ZOBRIST_UNMOVED_PAWNS[square]
+        self._unmoved_pawns = unmoved_pawns
+        self._game_state = game_state
+        self.switch_turns()
+        return True
 
     def remove_exploded_pieces(self, captured_piece) -> None:
         """Removes exploded chess pieces"""
-        surrounding_squares = self.get_surrounding_squares(captured_piece)
-        for square in surrounding_squares:
-            square_is_occupied = (self._board[square[0]][square[1]] != " ")
-            if square_is_occupied:
-                square_is_not_pawn = self._board[square[0]][square[1]].get_name() != "pawn"
-                if square_is_not_pawn:
-                    # if a king is exploding
-                    if self._board[square[0]][square[1]].get_name() == "king":
-                        if self._current_player == "white":
-                            self._game_state = "WHITE_WON"
-                        else:
-                            self._game_state = "BLACK_WON"
-                        self.return_winner()
-
-                    # remove exploding chess pieces
-                    self._board[square[0]][square[1]] = " "
-                    coordinates = convert_board_index_to_coordinates(square)
-                    del self._chess_pieces[coordinates]
+        captured_square = captured_piece.get_square()
+        pawns = self._piece_bitboards[PAWN] | self._piece_bitboards[6 + PAWN]
+        kings = self._piece_bitboards[KING] | self._piece_bitboards[6 + KING]
+        exploded = EXPLOSION_MASKS[captured_square] & ~(1 << captured_square) & self._occupied & ~pawns
+        for square in bitboard_squares(exploded):
+            # if a king is exploding
+            if kings >> square & 1:
+                if self._current_player == "white":
+                    self._game_state = "WHITE_WON"
+                else:
+                    self._game_state = "BLACK_WON"
+                self.return_winner()
+
+            # remove exploding chess pieces
+            self._board[square // 8][square % 8] = " "
+            del self._chess_pieces[SQUARE_NAMES[square]]
+            self._clear_bit(self.piece_code_at(square), square)
+
+    def _move_flags(self, from_square: int, to_square: int) -> int:
+        """Returns the flags legal_moves gives the move of the piece on from_square to to_square,
+        computed before the move is made, so recorded moves match the packed moves of legal_moves
+        """
+        to_bit = 1 << to_square
+        piece_bitboards = self._piece_bitboards
+        color = WHITE if self._color_bitboards[WHITE] >> from_square & 1 else BLACK
+        if self._color_bitboards[1 - color] & to_bit:
+            pawns = piece_bitboards[PAWN] | piece_bitboards[6 + PAWN]
+            removed = EXPLOSION_MASKS[to_square] & self._occupied & ~pawns | to_bit | 1 << from_square
+            if removed & (piece_bitboards[KING] | piece_bitboards[6 + KING]):
+                return MOVE_CAPTURE | MOVE_KILLS_KING
+            return MOVE_CAPTURE
+        if self._unmoved_pawns >> from_square & 1 and abs(to_square - from_square) == 16:
+            return MOVE_DOUBLE_STEP
+        return 0
 
     def make_move(self, move_from: str, move_to: str) -> bool:
         """Makes a move for the chess piece in the move_from coordinates to the move_to coordinates.
         Uses ChessPiece to update coordinates.
         """
+        if self._board is None:
+            return self._make_bitboard_move(move_from, move_to)
+
         # if move_from does not contain a piece belonging to current player, return false
         if move_from not in self._chess_pieces:
             print(f"No chess piece at move_from: {move_from}")
@@ -332,25 +1316,73 @@ class ChessVar:
             return False
 
         # make the move
+        from_square = SQUARE_INDEXES[move_from]
+        to_square = SQUARE_INDEXES[move_to]
+        unmoved_pawns = self._unmoved_pawns
+        game_state = self._game_state
+        move = encode_move(from_square, to_square, self._move_flags(from_square, to_square))
         # if captured piece is the opposing color, remove exploded surrounding pieces and attacking/capturing pieces
         if move_to in self._chess_pieces and self._chess_pieces[move_to].get_color() != self._current_player:
-            captured_piece = self._chess_pieces[move_to]
-            if self.both_kings_killed(captured_piece):
+            removed_pieces = self.resolve_capture(from_square, to_square)
+            if removed_pieces is None:
                 return False
-            self.remove_battle_pieces(self._chess_pieces[move_from], captured_piece)
-            self.remove_exploded_pieces(captured_piece)
         else:
+            replaced_code = self.piece_code_at(to_square)
+            removed_pieces = (replaced_code << 6 | to_square,) if replaced_code >= 0 else ()
             # update chess_pieces dictionary
             self._chess_pieces[move_from].set_coordinates(move_to)
             self._chess_pieces[move_to] = self._chess_pieces[move_from]
             del self._chess_pieces[move_from]
             # update board with move
             self.update_board(move_from, move_to)
+        self._undo_stack.append((move, removed_pieces, unmoved_pawns, game_state))
         # switch turns
         self.switch_turns()
         # return true
         return True
 
+    def _make_bitboard_move(self, move_from: str, move_to: str) -> bool:
+        """Makes a move on the bitboards only.
+        Follows the same checks, messages, and explosion rules as make_move.
+        """
+        # if move_from does not contain a piece belonging to current player, return false
+        from_square = SQUARE_INDEXES.get(move_from)
+        piece_code = -1 if from_square is None else self.piece_code_at(from_square)
+        if piece_code < 0:
+            print(f"No chess piece at move_from: {move_from}")
+            return False
+        color = piece_code // 6
+        if COLOR_NAMES[color] != self._current_player:
+            print(f"Not current player's piece: {move_from}")
+            return False
+        # if the move is invalid, return false
+        to_square = SQUARE_INDEXES.get(move_to)
+        first_move = bool(self._unmoved_pawns >> from_square & 1)
+        if to_square is None or not is_piece_target(
+            piece_code, from_square, to_square, self._occupied, self._color_bitboards[color], first_move
+        ):
+            print(f"Invalid move: {move_from} to {move_to}")
+            return False
+        # if the game_state is won, return false
+        if self._game_state != "UNFINISHED":
+            return False
+
+        # make the move
+        unmoved_pawns = self._unmoved_pawns
+        game_state = self._game_state
+        move = encode_move(from_square, to_square, self._move_flags(from_square, to_square))
+        captured_code = self.piece_code_at(to_square)
+        if captured_code >= 0 and captured_code // 6 != color:
+            removed_pieces = self.resolve_capture(from_square, to_square)
+            if removed_pieces is None:
+                return False
+        else:
+            removed_pieces = self._move_piece(from_square, to_square)
+        self._undo_stack.append((move, removed_pieces, unmoved_pawns, game_state))
+        # switch turns
+        self.switch_turns()
+        return True
+
     def return_winner(self) -> None:
         """Prints a message indicating the winner of the game."""
         if self._game_state == "WHITE_WON":
@@ -368,40 +1400,56 @@ class ChessVar:
 
 class ChessPiece:
     """A class to represent a chess piece in the atomic chess game. Used by ChessVar.
+    Pieces store only small integers in __slots__, so live games hold little memory per piece.
+    The name, color, coordinates, and unicode are derived from them.
 
     Attributes:
-        name: A string that labels the name of the chess piece.
-        color: A string that labels the chess piece as white or black.
-        coordinates: A string that indicates the position of the chess piece on the game board.
-        unicode: A string labeling the unicode to represent the chess piece type and color.
+        piece_code: An integer combining the color and piece type as color * 6 + piece type.
+        square: An integer from 0 (a1) to 63 (h8) of the position of the chess piece on the game board.
     """
 
+    __slots__ = ("_piece_code", "_square")
+
     def __init__(self, name: str, color: str, coordinates: str) -> None:
-        """Initializes the instance based on name, color, coordinates, and unicode of the chess piece."""
-        self._name = name
-        self._color = color
-        self._coordinates = coordinates
-        self._unicode = ""
+        """Initializes the instance based on name, color, and coordinates of the chess piece."""
+        self._piece_code = COLOR_NAMES.index(color) * 6 + PIECE_NAMES.index(name)
+        self._square = SQUARE_INDEXES[coordinates]
 
     def get_name(self) -> str:
         """Returns the name of the chess piece."""
-        return self._name
+        return PIECE_NAMES[self._piece_code % 6]
 
     def get_color(self) -> str:
         """Returns the color of the chess piece."""
-        return self._color
+        return COLOR_NAMES[self._piece_code // 6]
 
     def get_unicode(self) -> str:
         """Returns unicode of chess piece."""
-        return self._unicode
+        return PIECE_UNICODE[self._piece_code]
+
+    def get_piece_code(self) -> int:
+        """Returns the integer piece code of the chess piece, color * 6 + piece type."""
+        return self._piece_code
+
+    def is_first_move(self) -> bool:
+        """Returns true if the chess piece is a pawn that has not made its first move."""
+        return False
 
     def get_coordinates(self) -> str:
         """Returns coordinates of chess piece."""
-        return self._coordinates
+        return SQUARE_NAMES[self._square]
 
     def set_coordinates(self, coordinates: str) -> None:
         """Updates coordinates of the chess piece."""
-        self._coordinates = coordinates
+        self.set_square(SQUARE_INDEXES[coordinates])
+
+    def get_square(self) -> int:
+        """Returns the integer square of the chess piece."""
+        return self._square
+
+    def set_square(self, square: int) -> None:
+        """Updates the integer square of the chess piece."""
+        self._square = square
 
     @staticmethod
     def square_is_empty(board: list[list[[Union[str, "ChessPiece"]]]], square: list[int]):
@@ -411,6 +1459,32 @@ class ChessPiece:
         else:
             return False
 
+    def step_moves(self, board: list[list[[Union[str, "ChessPiece"]]]], squares: tuple[int, ...]) -> list[str]:
+        """Returns the coordinates of the squares that are empty or hold an opposing chess piece."""
+        possible_moves = []
+        for square in squares:
+            target = board[square // 8][square % 8]
+            if target == " " or target.get_piece_code() // 6 != self._piece_code // 6:
+                possible_moves.append(SQUARE_NAMES[square])
+        return possible_moves
+
+    def sliding_moves(self, board: list[list[[Union[str, "ChessPiece"]]]], directions: tuple[int, ...]) -> list[str]:
+        """Returns the coordinates of the squares along the ray directions,
+        up to the first chess piece and including it if it is an opposing chess piece.
+        """
+        possible_moves = []
+        current_square = self._square
+        for direction in directions:
+            for square in RAY_SQUARES[direction][current_square]:
+                target = board[square // 8][square % 8]
+                if target == " ":
+                    possible_moves.append(SQUARE_NAMES[square])
+                else:
+                    if target.get_piece_code() // 6 != self._piece_code // 6:
+                        possible_moves.append(SQUARE_NAMES[square])
+                    break
+        return possible_moves
+
 
 class Pawn(ChessPiece):
     """A class to represent a pawn chess piece.
@@ -420,21 +1494,32 @@ class Pawn(ChessPiece):
         first_move: A boolean determining if it is the Pawn's first move or not.
     """
 
+    __slots__ = ("_first_move",)
+
     def __init__(self, name: str, color: str, coordinates: str) -> None:
-        """Initializes the instance based on name, color, coordinates, unicode,
+        """Initializes the instance based on name, color, coordinates,
         and if this is the instance's first move of the chess piece.
         """
         super().__init__(name, color, coordinates)
-        self._unicode = "\u2659" if self._color == "white" else "\u265F"
         self._first_move = True
 
-    def set_coordinates(self, coordinates: str) -> None:
-        """Updates coordinates and first_move boolean of the pawn.
-        Overrides parent method.
+    def set_square(self, square: int) -> None:
+        """Updates the square and first_move boolean of the pawn.
+        Overrides parent method, so set_coordinates also ends the first move.
         """
-        self._coordinates = coordinates
+        self._square = square
         self._first_move = False
 
+    def is_first_move(self) -> bool:
+        """Returns true if the pawn has not made its first move.
+        Overrides parent method.
+        """
+        return self._first_move
+
+    def set_first_move(self, first_move: bool) -> None:
+        """Updates the first_move boolean of the pawn, used when a move is taken back."""
+        self._first_move = first_move
+
     def possible_moves(self, board: list[list[[Union[str, ChessPiece]]]]) -> list[str]:
         """Retrieves possible moves that the instance of Pawn can make from its current position.
 
@@ -445,50 +1530,20 @@ class Pawn(ChessPiece):
             A list of the instance's possible moves. Each move is represented by its algebraic coordinates.
         """
         possible_moves = []
-        current_position = convert_coordinates_to_board_index(self._coordinates)
+        current_square = self._square
+        color = self._piece_code // 6
 
         # forward steps
-        # pawn can move forward 1 square
-        forward_step = 1 if self._color == "white" else -1
-        forward_square = [current_position[0] + forward_step, current_position[1]]
-        square_coordinates = convert_board_index_to_coordinates(forward_square)
-        if self.square_is_empty(board, forward_square):
-            possible_moves.append(square_coordinates)
-        # if the pawn's first move, pawn can move forward 2 squares
-        if self._first_move:
-            forward_step *= 2
-            forward_square = [current_position[0] + forward_step, current_position[1]]
-            square_coordinates = convert_board_index_to_coordinates(forward_square)
-            if self.square_is_empty(board, forward_square):
-                possible_moves.append(square_coordinates)
+        # pawn can move forward 1 square, or 2 squares if it is the pawn's first move
+        step_squares = PAWN_STEP_SQUARES[color][current_square]
+        for square in step_squares if self._first_move else step_squares[:1]:
+            if board[square // 8][square % 8] == " ":
+                possible_moves.append(SQUARE_NAMES[square])
 
         # capturing a chess piece steps
-        if self._color == "white":
-            # check diagonal up left square
-            diagonal_up_left_square = [current_position[0] + 1, current_position[1] - 1]
-            if diagonal_up_left_square[0] < 8 and diagonal_up_left_square[1] >= 0:
-                if not self.square_is_empty(board, diagonal_up_left_square):
-                    square_coordinates = convert_board_index_to_coordinates(diagonal_up_left_square)
-                    possible_moves.append(square_coordinates)
-            # check diagonal up right square
-            diagonal_up_right_square = [current_position[0] + 1, current_position[1] + 1]
-            if diagonal_up_right_square[0] < 8 and diagonal_up_right_square[1] < 8:
-                if not self.square_is_empty(board, diagonal_up_right_square):
-                    square_coordinates = convert_board_index_to_coordinates(diagonal_up_right_square)
-                    possible_moves.append(square_coordinates)
-        if self._color == "black":
-            # check diagonal down left square
-            diagonal_left_down_square = [current_position[0] - 1, current_position[1] - 1]
-            if diagonal_left_down_square[0] >= 0 and diagonal_left_down_square[1] >= 0:
-                if not self.square_is_empty(board, diagonal_left_down_square):
-                    square_coordinates = convert_board_index_to_coordinates(diagonal_left_down_square)
-                    possible_moves.append(square_coordinates)
-            # check diagonal down right square
-            diagonal_down_right_square = [current_position[0] - 1, current_position[1] + 1]
-            if diagonal_down_right_square[0] >= 0 and diagonal_down_right_square[1] < 8:
-                if not self.square_is_empty(board, diagonal_down_right_square):
-                    square_coordinates = convert_board_index_to_coordinates(diagonal_down_right_square)
-                    possible_moves.append(square_coordinates)
+        for square in PAWN_CAPTURE_SQUARES[color][current_square]:
+            if board[square // 8][square % 8] != " ":
+                possible_moves.append(SQUARE_NAMES[square])
 
         return possible_moves
 
@@ -498,10 +1553,7 @@ class Bishop(ChessPiece):
     Inherits from ChessPiece.
     """
 
-    def __init__(self, name: str, color: str, coordinates: str) -> None:
-        """Initializes the instance based on name, color, coordinates, and unicode of the chess piece."""
-        super().__init__(name, color, coordinates)
-        self._unicode = "\u2657" if self._color == "white" else "\u265D"
+    __slots__ = ()
 
     def possible_moves(self, board: list[list[[Union[str, ChessPiece]]]]) -> list[str]:
         """Retrieves possible moves that the instance of Bishop can make from its current position.
@@ -512,66 +1564,7 @@ class Bishop(ChessPiece):
         Returns:
             A list of the instance's possible moves. Each move is represented by its algebraic coordinates.
         """
-        possible_moves = []
-        current_position = convert_coordinates_to_board_index(self._coordinates)
-
-        # check continuous diagonal up left squares
-        diagonal_up_left_moves = []
-        end = max(8 - current_position[0], current_position[1] + 1)
-        for step in range(1, end):
-            square = [current_position[0] + step, current_position[1] - step]
-            if square[0] < 8 and square[1] >= 0:
-                if self.square_is_empty(board, square):
-                    diagonal_up_left_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        diagonal_up_left_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += diagonal_up_left_moves
-
-        # check continuous diagonal up right squares
-        diagonal_up_right_moves = []
-        end = max(8 - current_position[0], 8 - current_position[1])
-        for step in range(1, end):
-            square = [current_position[0] + step, current_position[1] + step]
-            if square[0] < 8 and square[1] < 8:
-                if self.square_is_empty(board, square):
-                    diagonal_up_right_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        diagonal_up_right_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += diagonal_up_right_moves
-
-        # check continuous diagonal down left squares
-        diagonal_down_left_moves = []
-        end = max(current_position[0] + 1, current_position[1] + 1)
-        for step in range(1, end):
-            square = [current_position[0] - step, current_position[1] - step]
-            if square[0] >= 0 and square[1] >= 0:
-                if self.square_is_empty(board, square):
-                    diagonal_down_left_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        diagonal_down_left_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += diagonal_down_left_moves
-
-        # check continuous diagonal down right squares
-        diagonal_down_right_moves = []
-        end = max(current_position[0] + 1, 8 - current_position[1])
-        for step in range(1, end):
-            square = [current_position[0] - step, current_position[1] + step]
-            if square[0] >= 0 and square[1] < 8:
-                if self.square_is_empty(board, square):
-                    diagonal_down_right_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        diagonal_down_right_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += diagonal_down_right_moves
-
-        return possible_moves
+        return self.sliding_moves(board, BISHOP_DIRECTIONS)
 
 
 class Knight(ChessPiece):
@@ -579,10 +1572,7 @@ class Knight(ChessPiece):
     Inherits from ChessPiece.
     """
 
-    def __init__(self, name: str, color: str, coordinates: str) -> None:
-        """Initializes the instance based on name, color, coordinates, and unicode of the chess piece."""
-        super().__init__(name, color, coordinates)
-        self._unicode = "\u2658" if self._color == "white" else "\u265E"
+    __slots__ = ()
 
     def possible_moves(self, board: list[list[[Union[str, ChessPiece]]]]) -> list[str]:
         """Retrieves possible moves that the instance of Knight can make from its current position.
@@ -593,18 +1583,7 @@ class Knight(ChessPiece):
         Returns:
             A list of the instance's possible moves. Each move is represented by its algebraic coordinates.
         """
-        possible_moves = []
-        current_position = convert_coordinates_to_board_index(self._coordinates)
-        possible_steps = [(1, 2), (1, -2), (-1, -2), (-1, 2), (2, 1), (2, -1), (-2, 1), (-2, -1)]
-        for step in possible_steps:
-            square = [current_position[0] + step[0], current_position[1] + step[1]]
-            if 0 <= square[0] < 8 and 0 <= square[1] < 8:
-                if not self.square_is_empty(board, square):
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        possible_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    possible_moves.append(convert_board_index_to_coordinates(square))
-        return possible_moves
+        return self.step_moves(board, KNIGHT_SQUARES[self._square])
 
 
 class Rook(ChessPiece):
@@ -612,10 +1591,7 @@ class Rook(ChessPiece):
     Inherits from ChessPiece.
     """
 
-    def __init__(self, name: str, color: str, coordinates: str) -> None:
-        """Initializes the instance based on name, color, coordinates, and unicode of the chess piece."""
-        super().__init__(name, color, coordinates)
-        self._unicode = "\u2656" if self._color == "white" else "\u265C"
+    __slots__ = ()
 
     def possible_moves(self, board: list[list[[Union[str, ChessPiece]]]]) -> list[str]:
         """Retrieves possible moves that the instance of Rook can make from its current position.
@@ -626,62 +1602,7 @@ class Rook(ChessPiece):
         Returns:
             A list of the instance's possible moves. Each move is represented by its algebraic coordinates.
         """
-        possible_moves = []
-        current_position = convert_coordinates_to_board_index(self._coordinates)
-
-        # check continuous left moves
-        left_moves = []
-        for step in range(1, current_position[1] + 1):
-            square = [current_position[0], current_position[1] - step]
-            if square[1] >= 0:
-                if self.square_is_empty(board, square):
-                    left_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        left_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += left_moves
-
-        # check continuous right moves
-        right_moves = []
-        for step in range(1, 8 - current_position[1]):
-            square = [current_position[0], current_position[1] + step]
-            if square[1] < 8:
-                if self.square_is_empty(board, square):
-                    right_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        right_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += right_moves
-
-        # check continuous up moves
-        up_moves = []
-        for step in range(1, 8 - current_position[0]):
-            square = [current_position[0] + step, current_position[1]]
-            if square[0] < 8:
-                if self.square_is_empty(board, square):
-                    up_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        up_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += up_moves
-
-        # check continuous down moves
-        down_moves = []
-        for step in range(1, current_position[0] + 1):
-            square = [current_position[0] - step, current_position[1]]
-            if square[0] >= 0:
-                if self.square_is_empty(board, square):
-                    down_moves.append(convert_board_index_to_coordinates(square))
-                else:
-                    if board[square[0]][square[1]].get_color() != self._color:
-                        down_moves.append(convert_board_index_to_coordinates(square))
-                    break
-        possible_moves += down_moves
-
-        return possible_moves
+        return self.sliding_moves(board, ROOK_DIRECTIONS)
 
 
 class Queen(ChessPiece):
@@ -689,10 +1610,7 @@ class Queen(ChessPiece):
     Inherits from ChessPiece.
     """
 
-    def __init__(self, name: str, color: str, coordinates: str) -> None:
-        """Initializes the instance based on name, color, coordinates, and unicode of the chess piece."""
-        super().__init__(name, color, coordinates)
-        self._unicode = "\u2655" if self._color == "white" else "\u265B"
+    __slots__ = ()
 
     def possible_moves(self, board: list[list[[Union[str, ChessPiece]]]]) -> list[str]:
         """Retrieves possible moves that the instance of Queen can make from its current position.
@@ -703,12 +1621,7 @@ class Queen(ChessPiece):
         Returns:
             A list of the instance's possible moves. Each move is represented by its algebraic coordinates.
         """
-        possible_moves = []
-        rook_temp = Rook("rook", self._color, self._coordinates)
-        bishop_temp = Bishop("bishop", self._color, self._coordinates)
-        possible_moves += rook_temp.possible_moves(board)
-        possible_moves += bishop_temp.possible_moves(board)
-        return possible_moves
+        return self.sliding_moves(board, ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
 
 
 class King(ChessPiece):
@@ -716,10 +1629,7 @@ class King(ChessPiece):
     Inherits from ChessPiece.
     """
 
-    def __init__(self, name: str, color: str, coordinates: str) -> None:
-        """Initializes the instance based on name, color, coordinates, and unicode of the chess piece."""
-        super().__init__(name, color, coordinates)
-        self._unicode = "\u2654" if self._color == "white" else "\u265A"
+    __slots__ = ()
 
     def possible_moves(self, board: list[list[[Union[str, ChessPiece]]]]) -> list[str]:
         """Retrieves possible moves that the instance of King can make from its current position.
@@ -731,12 +1641,14 @@ class King(ChessPiece):
             A list of the instance's possible moves. Each move is represented by its algebraic coordinates.
         """
         possible_moves = []
-        current_position = convert_coordinates_to_board_index(self._coordinates)
-        possible_steps = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
-        for step in possible_steps:
-            square = [current_position[0] + step[0], current_position[1] + step[1]]
-            if 0 <= square[0] < 8 and 0 <= square[1] < 8:
-                square_is_empty = board[square[0]][square[1]] == " "
-                if square_is_empty:
-                    possible_moves.append(convert_board_index_to_coordinates(square))
+        for square in KING_SQUARES[self._square]:
+            if board[square // 8][square % 8] == " ":
+                possible_moves.append(SQUARE_NAMES[square])
         return possible_moves
+
+
+# ChessPiece subclasses indexed by piece type
+PIECE_CLASSES = (Pawn, Knight, Bishop, Rook, Queen, King)
+
+# the snapshot reset restores, shared by every game
+STARTING_SNAPSHOT = ChessVar("bitboards").snapshot()
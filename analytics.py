@@ -0,0 +1,186 @@
+"""Map-reduce statistics over the games of a game store.
+
+The games are split into ranges of indexes that worker processes replay silently straight from
+the memory-mapped store. Each worker counts its range into Counters that are merged as they arrive.
+
+Run "python analytics.py games.store --workers 8" to print a report,
+and add "--json report.json" to also write the merged counts.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+from ChessVar import (BLACK, KING, MOVE_CAPTURE, MOVE_KILLS_KING, SQUARE_NAMES, WHITE, ChessVar, bitboard_squares,
+                      move_to_coordinates)
+from gamestore import GameStoreReader
+
+
+# the Counters of a report and what they count
+STATISTICS = {
+    "results": "games by final game state",
+    "openings": "games by (first moves, final game state)",
+    "game_lengths": "games by number of plies",
+    "explosion_sizes": "captures by number of pieces removed",
+    "capture_losses": "captures by (own pieces lost, opposing pieces lost)",
+    "king_kill_squares": "games by the square of the exploded king",
+}
+
+
+def analyze_games(path: str, start: int, stop: int, opening_plies: int = 2) -> dict[str, Counter]:
+    """Replays the games start to stop of a store without printing anything and counts their statistics.
+    The stored moves are pushed as they are, with the flags of ChessVar.legal_moves that the store records.
+
+    Args:
+        path: The path of the store
+        start: The index of the first game
+        stop: The index after the last game
+        opening_plies: The number of moves that make up the opening of a game
+    Returns:
+        A Counter for each name in STATISTICS
+    """
+    counts = {name: Counter() for name in STATISTICS}
+    results = counts["results"]
+    openings = counts["openings"]
+    game_lengths = counts["game_lengths"]
+    explosion_sizes = counts["explosion_sizes"]
+    capture_losses = counts["capture_losses"]
+    king_kill_squares = counts["king_kill_squares"]
+    with GameStoreReader(path) as reader:
+        for index in range(start, stop):
+            record = reader[index]
+            game = ChessVar.from_bytes(bytes(record.start_position), "bitboards")
+            moves = record.moves
+            for move in moves:
+                if not move >> 12 & MOVE_CAPTURE:
+                    game.push_move(move)
+                    continue
+                color = WHITE if game.get_current_player() == "white" else BLACK
+                before = game.get_piece_bitboards()
+                game.push_move(move)
+                after = game.get_piece_bitboards()
+                own_lost = sum((before[piece_code] & ~after[piece_code]).bit_count()
+                               for piece_code in range(color * 6, color * 6 + 6))
+                opposing_lost = sum((before[piece_code] & ~after[piece_code]).bit_count()
+                                    for piece_code in range((1 - color) * 6, (1 - color) * 6 + 6))
+                explosion_sizes[own_lost + opposing_lost] += 1
+                capture_losses[own_lost, opposing_lost] += 1
+                if move >> 12 & MOVE_KILLS_KING:
+                    killed_kings = (before[KING] | before[6 + KING]) & ~(after[KING] | after[6 + KING])
+                    for square in bitboard_squares(killed_kings):
+                        king_kill_squares[SQUARE_NAMES[square]] += 1
+            opening = " ".join("-".join(move_to_coordinates(move)) for move in moves[:opening_plies])
+            results[record.game_state] += 1
+            openings[opening, record.game_state] += 1
+            game_lengths[len(moves)] += 1
+            moves.release()
+            record.start_position.release()
+    return counts
+
+
+def merge_counts(total: dict[str, Counter], partial: dict[str, Counter]) -> dict[str, Counter]:
+    """Adds the Counters of a partial result to the total and returns the total"""
+    for name, counter in partial.items():
+        total[name].update(counter)
+    return total
+
+
+def analyze_store(path: str, workers: Optional[int] = None, chunk_size: int = 10000,
+                  opening_plies: int = 2) -> dict[str, Counter]:
+    """Counts the statistics of every game of a store across a pool of worker processes.
+    Each worker replays chunk_size games at a time, in this process if there is one worker or one chunk.
+
+    Returns:
+        A Counter for each name in STATISTICS
+    """
+    with GameStoreReader(path) as reader:
+        game_count = len(reader)
+    chunks = [(start, min(start + chunk_size, game_count)) for start in range(0, game_count, chunk_size)]
+    total = {name: Counter() for name in STATISTICS}
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) < 2:
+        for start, stop in chunks:
+            merge_counts(total, analyze_games(path, start, stop, opening_plies))
+        return total
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(analyze_games, path, start, stop, opening_plies) for start, stop in chunks]
+        for future in as_completed(futures):
+            merge_counts(total, future.result())
+    return total
+
+
+def format_report(counts: dict[str, Counter], top: int = 10) -> str:
+    """Returns a readable summary of merged statistics, listing the top most common openings and squares"""
+    games = sum(counts["results"].values())
+    if not games:
+        return "no games"
+    lines = [f"{games} games"]
+    for game_state, count in counts["results"].most_common():
+        lines.append(f"  {game_state:<12} {count:>12} {count / games:8.1%}")
+
+    lengths = sorted(counts["game_lengths"].elements())
+    quantiles = statistics.quantiles(lengths, n=10) if len(lengths) > 1 else lengths * 9
+    lines.append(f"game length: mean {statistics.fmean(lengths):.1f} plies, median {statistics.median(lengths):g}, "
+                 f"10% {quantiles[0]:g}, 90% {quantiles[-1]:g}, longest {lengths[-1]}")
+
+    captures = sum(counts["explosion_sizes"].values())
+    if captures:
+        mean_size = sum(size * count for size, count in counts["explosion_sizes"].items()) / captures
+        own = sum(losses[0] * count for losses, count in counts["capture_losses"].items()) / captures
+        opposing = sum(losses[1] * count for losses, count in counts["capture_losses"].items()) / captures
+        lines.append(f"{captures} captures: {mean_size:.2f} pieces removed on average, "
+                     f"{own:.2f} own and {opposing:.2f} opposing")
+        sizes = ", ".join(f"{size}: {count}" for size, count in sorted(counts["explosion_sizes"].items()))
+        lines.append(f"  pieces removed per capture  {sizes}")
+
+    opening_games = Counter()
+    for (opening, _), count in counts["openings"].items():
+        opening_games[opening] += count
+    lines.append("openings            games   white won   black won")
+    for opening, count in opening_games.most_common(top):
+        white_won = counts["openings"][opening, "WHITE_WON"] / count
+        black_won = counts["openings"][opening, "BLACK_WON"] / count
+        lines.append(f"  {opening or '(none)':<16} {count:>8} {white_won:11.1%} {black_won:11.1%}")
+
+    squares = ", ".join(f"{square}: {count}" for square, count in counts["king_kill_squares"].most_common(top))
+    lines.append(f"exploded king squares  {squares}")
+    return "\n".join(lines)
+
+
+def counts_to_json(counts: dict[str, Counter]) -> dict[str, dict[str, int]]:
+    """Returns the Counters with their tuple keys joined by "|", so they can be written as JSON"""
+    return {
+        name: {"|".join(map(str, key)) if isinstance(key, tuple) else str(key): count
+               for key, count in counter.most_common()}
+        for name, counter in counts.items()
+    }
+
+
+def main() -> None:
+    """Analyzes a store from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("store_path")
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU core by default")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="games per worker task")
+    parser.add_argument("--opening-plies", type=int, default=2, help="moves that make up an opening")
+    parser.add_argument("--top", type=int, default=10, help="openings and squares to list")
+    parser.add_argument("--json", help="file to write the merged counts to")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = analyze_store(args.store_path, args.workers, args.chunk_size, args.opening_plies)
+    elapsed = time.perf_counter() - start
+    print(format_report(counts, args.top))
+    games = sum(counts["results"].values())
+    print(f"analyzed in {elapsed:.1f} s, {games / elapsed:,.0f} games/s")
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(counts_to_json(counts), json_file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""Vectorized NumPy operations over batches of ChessVar positions.
+
+A batch of N positions is either an int8 array of shape (N, 8, 8) holding the piece code of each square,
+indexed like the ChessVar board by row (0 is rank 1) and column, with -1 for empty squares,
+or a uint64 array of shape (N, 12) holding the piece bitboards of each position.
+This module requires NumPy.
+"""
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from ChessVar import (
+    BETWEEN, BISHOP, BISHOP_DIRECTIONS, BISHOP_LINES, BLACK, DIRECTION_STEPS, EXPLOSION_MASKS, KING, KING_ATTACKS,
+    KNIGHT, KNIGHT_ATTACKS, MOVE_ACCEPTED, PAWN, PAWN_ATTACKS, PAWN_DOUBLE_PUSHES, PAWN_PUSHES, QUEEN,
+    REJECT_BOTH_KINGS, REJECT_GAME_OVER, REJECT_ILLEGAL_GEOMETRY, REJECT_NO_PIECE, REJECT_WRONG_COLOR, ROOK,
+    ROOK_DIRECTIONS, ROOK_LINES, WHITE, ChessVar, bitboard_squares,
+)
+from engine import PIECE_VALUES
+
+
+# centipawns for each square a piece can move to, and for a king that an opposing capture can explode
+MOBILITY_WEIGHT = 4
+KING_IN_RANGE_PENALTY = 300
+
+
+def _table_matrix(bitboards: Sequence[int]) -> np.ndarray:
+    """Returns a (64, 64) matrix with a one at [from square, to square] for each square of the bitboards.
+    The matrices are float32 so that products with piece planes run through BLAS.
+    """
+    matrix = np.zeros((64, 64), dtype=np.float32)
+    for square, bitboard in enumerate(bitboards):
+        matrix[square, bitboard_squares(bitboard)] = 1
+    return matrix
+
+
+KNIGHT_MATRIX = _table_matrix(KNIGHT_ATTACKS)
+KING_MATRIX = _table_matrix(KING_ATTACKS)
+EXPLOSION_MATRIX = _table_matrix(EXPLOSION_MASKS)
+PAWN_PUSH_MATRICES = tuple(_table_matrix(PAWN_PUSHES[color]) for color in (WHITE, BLACK))
+PAWN_ATTACK_MATRICES = tuple(_table_matrix(PAWN_ATTACKS[color]) for color in (WHITE, BLACK))
+
+# uint64 copies of the bitboard tables for gathering by square
+_KNIGHT_TARGETS = np.array(KNIGHT_ATTACKS, dtype=np.uint64)
+_KING_TARGETS = np.array(KING_ATTACKS, dtype=np.uint64)
+_EXPLOSION_MASKS = np.array(EXPLOSION_MASKS, dtype=np.uint64)
+_PAWN_PUSHES = np.array(PAWN_PUSHES, dtype=np.uint64)
+_PAWN_DOUBLE_PUSHES = np.array(PAWN_DOUBLE_PUSHES, dtype=np.uint64)
+_PAWN_ATTACKS = np.array(PAWN_ATTACKS, dtype=np.uint64)
+_ROOK_LINES = np.array(ROOK_LINES, dtype=np.uint64)
+_BISHOP_LINES = np.array(BISHOP_LINES, dtype=np.uint64)
+_BETWEEN = np.array(BETWEEN, dtype=np.uint64)
+# pawns on their starting rank, white on rank 2 and black on rank 7
+_PAWN_START_RANKS = np.uint64(0xFF << 8 | 0xFF << 48)
+
+_MATERIAL_VALUES = np.array(PIECE_VALUES[:5] + (0,) + tuple(-value for value in PIECE_VALUES[:5]) + (0,))
+
+
+class BatchValidation(NamedTuple):
+    """The result of validating a batch of N moves.
+
+    Attributes:
+        valid: An (N,) boolean array that is true for the moves make_move would accept
+        reasons: An (N,) int8 array of MOVE_ACCEPTED or the REJECT code of the first check each move fails
+    """
+    valid: np.ndarray
+    reasons: np.ndarray
+
+
+class BatchEvaluation(NamedTuple):
+    """The static evaluation of a batch of N positions.
+
+    Attributes:
+        scores: An (N,) array of the total scores in centipawns
+        material: An (N,) array of the material balance in centipawns from white's point of view
+        mobility: An (N, 2) array of the number of moves of white and of black
+        kings_in_range: An (N, 2) boolean array that is true where an opposing capture can explode
+            the white or the black king
+    """
+    scores: np.ndarray
+    material: np.ndarray
+    mobility: np.ndarray
+    kings_in_range: np.ndarray
+
+
+def stack_boards(games: Sequence[ChessVar]) -> np.ndarray:
+    """Returns the (N, 8, 8) piece code array of the games"""
+    boards = np.full((len(games), 64), -1, dtype=np.int8)
+    bitboards = stack_bitboards(games)
+    planes = planes_from_bitboards(bitboards)
+    for piece_code in range(12):
+        boards[planes[:, piece_code]] = piece_code
+    return boards.reshape(-1, 8, 8)
+
+
+def stack_bitboards(games: Sequence[ChessVar]) -> np.ndarray:
+    """Returns the (N, 12) piece bitboard array of the games"""
+    return np.array([game.get_piece_bitboards() for game in games], dtype=np.uint64).reshape(-1, 12)
+
+
+def players_to_move(games: Sequence[ChessVar]) -> np.ndarray:
+    """Returns an (N,) array of the color to move in each game, 0 for white and 1 for black"""
+    return np.array([game.get_current_player() == "black" for game in games], dtype=np.int8)
+
+
+def stack_games_over(games: Sequence[ChessVar]) -> np.ndarray:
+    """Returns an (N,) boolean array that is true for the games that have been won"""
+    return np.array([game.get_game_state() != "UNFINISHED" for game in games], dtype=bool)
+
+
+def stack_unmoved_pawns(games: Sequence[ChessVar]) -> np.ndarray:
+    """Returns an (N,) array of the bitboards of the pawns that have not made their first move in each game"""
+    return np.array([game.get_unmoved_pawns() for game in games], dtype=np.uint64)
+
+
+def planes_from_bitboards(bitboards: np.ndarray) -> np.ndarray:
+    """Returns an (N, 12, 64) boolean array of the squares occupied by each piece code"""
+    bitboards = np.ascontiguousarray(bitboards, dtype="<u8").reshape(-1, 12)
+    bits = np.unpackbits(bitboards.view(np.uint8).reshape(-1, 12, 8), axis=2, bitorder="little")
+    return bits.astype(bool)
+
+
+def bitboards_from_boards(boards: np.ndarray) -> np.ndarray:
+    """Returns the (N, 12) piece bitboard array of an (N, 8, 8) piece code array"""
+    bits = np.packbits(planes_from_boards(boards), axis=2, bitorder="little")
+    return np.ascontiguousarray(bits).view("<u8").reshape(-1, 12).astype(np.uint64)
+
+
+def planes_from_boards(boards: np.ndarray) -> np.ndarray:
+    """Returns an (N, 12, 64) boolean array of the squares occupied by each piece code"""
+    squares = np.asarray(boards).reshape(-1, 1, 64)
+    return squares == np.arange(12).reshape(1, 12, 1)
+
+
+def as_bitboards(positions: np.ndarray) -> np.ndarray:
+    """Returns the piece bitboards of positions given as (N, 8, 8) boards or (N, 12) bitboards"""
+    positions = np.asarray(positions)
+    if positions.ndim == 3 and positions.shape[1:] == (8, 8):
+        return bitboards_from_boards(positions)
+    if positions.ndim == 2 and positions.shape[1] == 12:
+        return positions.astype(np.uint64, copy=False)
+    raise ValueError(f"Expected positions of shape (N, 8, 8) or (N, 12), not {positions.shape}")
+
+
+def as_planes(positions: np.ndarray) -> np.ndarray:
+    """Returns the piece planes of positions given as (N, 8, 8) boards or (N, 12) bitboards"""
+    positions = np.asarray(positions)
+    if positions.ndim == 3 and positions.shape[1:] == (8, 8):
+        return planes_from_boards(positions)
+    if positions.ndim == 2 and positions.shape[1] == 12:
+        return planes_from_bitboards(positions)
+    raise ValueError(f"Expected positions of shape (N, 8, 8) or (N, 12), not {positions.shape}")
+
+
+def _sliding_targets(sliders: np.ndarray, occupied: np.ndarray, directions: Sequence[int]) -> np.ndarray:
+    """Returns an (N, 64) count of the sliders that reach each square, up to and including the nearest blocker"""
+    sliders = sliders.reshape(-1, 8, 8)
+    empty = ~occupied.reshape(-1, 8, 8)
+    targets = np.zeros(sliders.shape, dtype=np.int16)
+    for direction in directions:
+        row_step, column_step = DIRECTION_STEPS[direction]
+        # the board slices a step moves squares from and to
+        to_rows = slice(max(row_step, 0), 8 + min(row_step, 0))
+        from_rows = slice(max(-row_step, 0), 8 - max(row_step, 0))
+        to_columns = slice(max(column_step, 0), 8 + min(column_step, 0))
+        from_columns = slice(max(-column_step, 0), 8 - max(column_step, 0))
+        front = sliders
+        for _ in range(7):
+            stepped = np.zeros_like(front)
+            stepped[:, to_rows, to_columns] = front[:, from_rows, from_columns]
+            if not stepped.any():
+                break
+            targets += stepped
+            front = stepped & empty
+    return targets.reshape(-1, 64)
+
+
+def piece_targets_batch(planes: np.ndarray, color: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns (N, 64) counts of the pieces of the color that can move to each square, and of the pieces
+    other than the king that can capture on each square, following piece_targets without pawn double steps.
+    """
+    offset = color * 6
+    occupied = planes.any(axis=1)
+    own = planes[:, offset:offset + 6].any(axis=1)
+    opposing = occupied & ~own
+    pawns = planes[:, offset + PAWN].astype(np.float32)
+    knights = planes[:, offset + KNIGHT].astype(np.float32)
+    kings = planes[:, offset + KING].astype(np.float32)
+    straight = planes[:, offset + ROOK] | planes[:, offset + QUEEN]
+    diagonal = planes[:, offset + BISHOP] | planes[:, offset + QUEEN]
+
+    pawn_steps = (pawns @ PAWN_PUSH_MATRICES[color]) * ~occupied
+    # pawns can step diagonally onto any occupied square, but only opposing pieces explode
+    pawn_attacks = pawns @ PAWN_ATTACK_MATRICES[color]
+    piece_attacks = (
+        knights @ KNIGHT_MATRIX
+        + _sliding_targets(straight, occupied, ROOK_DIRECTIONS)
+        + _sliding_targets(diagonal, occupied, BISHOP_DIRECTIONS)
+    )
+    moves = pawn_steps + pawn_attacks * occupied + piece_attacks * ~own + (kings @ KING_MATRIX) * ~occupied
+    captures = (pawn_attacks + piece_attacks) * opposing
+    return moves, captures
+
+
+def evaluate_batch(positions: np.ndarray, players: Optional[np.ndarray] = None) -> BatchEvaluation:
+    """Statically evaluates a batch of positions in one vectorized pass.
+
+    Args:
+        positions: An (N, 8, 8) piece code array or an (N, 12) bitboard array
+        players: An (N,) array of the color each score is from the point of view of,
+            0 for white and 1 for black, or None for white's point of view
+    Returns:
+        A BatchEvaluation of material, mobility, and kings in explosion range, with scores combining all three
+    """
+    planes = as_planes(positions)
+    material = planes.sum(axis=2) @ _MATERIAL_VALUES
+
+    kings = planes[:, [KING, 6 + KING]].astype(np.float32)
+    # squares whose explosion reaches the white and the black king
+    king_blasts = (kings @ EXPLOSION_MATRIX) > 0
+    mobility = np.zeros((len(planes), 2), dtype=np.int32)
+    kings_in_range = np.zeros((len(planes), 2), dtype=bool)
+    for color in (WHITE, BLACK):
+        moves, captures = piece_targets_batch(planes, color)
+        mobility[:, color] = moves.sum(axis=1)
+        # a capture exploding both kings is not allowed, so it only threatens when the own king is out of range
+        threats = (captures > 0) & king_blasts[:, 1 - color] & ~king_blasts[:, color]
+        kings_in_range[:, 1 - color] = threats.any(axis=1)
+
+    scores = (
+        material
+        + MOBILITY_WEIGHT * (mobility[:, WHITE] - mobility[:, BLACK])
+        - KING_IN_RANGE_PENALTY * (kings_in_range[:, WHITE].astype(int) - kings_in_range[:, BLACK])
+    )
+    if players is not None:
+        scores = np.where(np.asarray(players) == BLACK, -scores, scores)
+    return BatchEvaluation(scores, material, mobility, kings_in_range)
+
+
+def validate_moves(positions: np.ndarray, from_squares: np.ndarray, to_squares: np.ndarray, players: np.ndarray,
+                   unmoved_pawns: Optional[np.ndarray] = None,
+                   games_over: Optional[np.ndarray] = None) -> BatchValidation:
+    """Checks a batch of moves the way ChessVar.check_move does, in one vectorized pass.
+
+    Args:
+        positions: An (N, 8, 8) piece code array or an (N, 12) bitboard array, one position for each move
+        from_squares: An (N,) array of the squares of the pieces to move, from 0 (a1) to 63 (h8)
+        to_squares: An (N,) array of the squares to move the pieces to
+        players: An (N,) array of the color to move in each position, 0 for white and 1 for black
+        unmoved_pawns: An (N,) array of the bitboards of the pawns that have not made their first move,
+            or None to treat the pawns on their starting rank as unmoved
+        games_over: An (N,) boolean array that is true where the game has been won,
+            or None to treat positions missing a king as won.
+            This differs from the game state only after a pawn has stepped onto its own king.
+    Returns:
+        A BatchValidation of the accepted moves and the rejection reasons
+    """
+    bitboards = as_bitboards(positions)
+    from_squares = np.asarray(from_squares, dtype=np.int64)
+    to_squares = np.asarray(to_squares, dtype=np.int64)
+    players = np.asarray(players, dtype=np.int64)
+    from_on_board = (from_squares >= 0) & (from_squares < 64)
+    to_on_board = (to_squares >= 0) & (to_squares < 64)
+    from_squares = np.where(from_on_board, from_squares, 0)
+    to_squares = np.where(to_on_board, to_squares, 0)
+    one = np.uint64(1)
+    from_bits = one << from_squares.astype(np.uint64)
+    to_bits = one << to_squares.astype(np.uint64)
+
+    white = np.bitwise_or.reduce(bitboards[:, :6], axis=1)
+    black = np.bitwise_or.reduce(bitboards[:, 6:], axis=1)
+    occupied = white | black
+    pawns = bitboards[:, PAWN] | bitboards[:, 6 + PAWN]
+    kings = bitboards[:, KING] | bitboards[:, 6 + KING]
+    if unmoved_pawns is None:
+        unmoved_pawns = pawns & _PAWN_START_RANKS
+    unmoved_pawns = np.asarray(unmoved_pawns, dtype=np.uint64)
+
+    # the piece on the from square
+    on_from = (bitboards & from_bits[:, None]) != 0
+    has_piece = on_from.any(axis=1) & from_on_board
+    piece_codes = on_from.argmax(axis=1)
+    colors = piece_codes // 6
+    piece_types = piece_codes % 6
+    own = np.where(colors == WHITE, white, black)
+    opposing = np.where(colors == WHITE, black, white)
+    to_occupied = (occupied & to_bits) != 0
+    to_own = (own & to_bits) != 0
+
+    # the geometry checks of is_piece_target
+    pawn_attack = (_PAWN_ATTACKS[colors, from_squares] & to_bits) != 0
+    first_move = (unmoved_pawns & from_bits) != 0
+    pawn_step = ((_PAWN_PUSHES[colors, from_squares] & to_bits) != 0) | (
+        first_move & ((_PAWN_DOUBLE_PUSHES[colors, from_squares] & to_bits) != 0)
+    )
+    pawn_ok = np.where(pawn_attack, to_occupied, ~to_occupied & pawn_step)
+    lines = np.select(
+        [piece_types == BISHOP, piece_types == ROOK],
+        [_BISHOP_LINES[from_squares], _ROOK_LINES[from_squares]],
+        _ROOK_LINES[from_squares] | _BISHOP_LINES[from_squares],
+    )
+    slider_ok = ((lines & to_bits) != 0) & ((_BETWEEN[from_squares, to_squares] & occupied) == 0)
+    piece_ok = np.select(
+        [piece_types == KNIGHT, piece_types == KING],
+        [(_KNIGHT_TARGETS[from_squares] & to_bits) != 0, ~to_occupied & ((_KING_TARGETS[from_squares] & to_bits) != 0)],
+        slider_ok,
+    )
+    geometry_ok = to_on_board & np.where(piece_types == PAWN, pawn_ok, ~to_own & piece_ok)
+
+    if games_over is None:
+        games_over = (bitboards[:, KING] == 0) | (bitboards[:, 6 + KING] == 0)
+    # a capture that destroys both kings is not allowed
+    captures = (opposing & to_bits) != 0
+    removed = _EXPLOSION_MASKS[to_squares] & occupied & ~pawns | to_bits | from_bits
+    kings_killed = removed & kings
+    both_kings = captures & ((kings_killed & (kings_killed - one)) != 0)
+
+    reasons = np.select(
+        [~has_piece, colors != players, ~geometry_ok, np.asarray(games_over, dtype=bool), both_kings],
+        [REJECT_NO_PIECE, REJECT_WRONG_COLOR, REJECT_ILLEGAL_GEOMETRY, REJECT_GAME_OVER, REJECT_BOTH_KINGS],
+        MOVE_ACCEPTED,
+    ).astype(np.int8)
+    return BatchValidation(reasons == MOVE_ACCEPTED, reasons)
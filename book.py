@@ -0,0 +1,233 @@
+"""An opening book of ChessVar positions built from stored or self-played games.
+
+A book file starts with BOOK_MAGIC followed by BOOK_ENTRY records sorted by position key and move:
+the Zobrist key of a position, a packed move played from it, and the number of games
+with that move that white won, black won, or did not finish.
+
+Run "python book.py build book.bin games.store selfplay.jsonl --plies 16" to build a book,
+and "python book.py probe book.bin" to list the book moves of the starting position or of a FEN.
+"""
+import argparse
+import json
+import mmap
+import random
+import struct
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+from ChessVar import GAME_STATES, ChessVar, move_to_coordinates
+from gamestore import STORE_MAGIC, GameStoreReader
+from selfplay import opening_moves
+
+
+BOOK_MAGIC = b"ATOMBK1\n"
+# position key, packed move, games, white wins, black wins, and unfinished games
+BOOK_ENTRY = struct.Struct("<QHIIII")
+_KEY = struct.Struct("<Q")
+
+
+class BookMove(NamedTuple):
+    """A move of the book with the results of the games it was played in.
+
+    Attributes:
+        move: The packed move, see ChessVar.legal_moves
+        games: The number of games
+        white_wins: The number of games won by white
+        black_wins: The number of games won by black
+        unfinished: The number of games stopped before a king exploded
+    """
+    move: int
+    games: int
+    white_wins: int
+    black_wins: int
+    unfinished: int
+
+
+def store_games(path: str) -> Iterator[tuple[Sequence[int], str, bytes]]:
+    """Yields the moves, final game state, and binary start position of every game of a store"""
+    with GameStoreReader(path) as reader:
+        for record in reader:
+            yield record.moves, record.game_state, bytes(record.start_position)
+
+
+def selfplay_games(path: str, plies: Optional[int] = None) -> Iterator[tuple[Sequence[int], str, Optional[bytes]]]:
+    """Yields the first plies packed moves and the final game state of every game of a selfplay.py JSON lines file"""
+    with open(path) as json_file:
+        for line in json_file:
+            record = json.loads(line)
+            game = ChessVar("bitboards")
+            yield opening_moves(game, tuple(record["moves"][:plies])), record["result"], None
+
+
+def count_games(games: Iterator[tuple[Sequence[int], str, Optional[bytes]]], plies: int,
+                counts: Optional[dict[tuple[int, int], list[int]]] = None) -> dict[tuple[int, int], list[int]]:
+    """Counts the results of the first plies moves of the games.
+    A game stops being counted at its first move that is not a legal move of its position.
+
+    Args:
+        games: Moves, final game state, and binary start position of games, None for the starting position
+        plies: The number of moves of each game to count
+        counts: The counts to add to, a new dictionary if None
+    Returns:
+        The counts as [games, white wins, black wins, unfinished] by (position key, move)
+    """
+    if counts is None:
+        counts = {}
+    for moves, game_state, start_position in games:
+        if start_position is None:
+            game = ChessVar("bitboards")
+        else:
+            game = ChessVar.from_bytes(start_position, "bitboards")
+        result = GAME_STATES.index(game_state)
+        for move in moves[:plies]:
+            # a corrupt move would put every later move of the game in the wrong position
+            if move not in game.legal_moves():
+                break
+            key = (game.get_zobrist_key(), move)
+            count = counts.get(key)
+            if count is None:
+                count = counts[key] = [0, 0, 0, 0]
+            count[0] += 1
+            # GAME_STATES is ordered unfinished, white won, black won
+            count[3 if result == 0 else result] += 1
+            game.push_move(move)
+    return counts
+
+
+def write_book(path: str, counts: dict[tuple[int, int], list[int]], min_games: int = 1) -> int:
+    """Writes the counted moves played in at least min_games games as a book, sorted by position key and move.
+
+    Returns:
+        The number of entries written
+    """
+    entries = 0
+    with open(path, "wb") as book_file:
+        book_file.write(BOOK_MAGIC)
+        for (key, move), count in sorted(counts.items()):
+            if count[0] >= min_games:
+                book_file.write(BOOK_ENTRY.pack(key, move, *count))
+                entries += 1
+    return entries
+
+
+def build_book(output: str, sources: Sequence[str], plies: int = 16, min_games: int = 1) -> int:
+    """Builds a book from game stores and selfplay.py JSON lines files, told apart by the store magic.
+
+    Returns:
+        The number of entries written
+    """
+    counts = {}
+    for source in sources:
+        with open(source, "rb") as source_file:
+            is_store = source_file.read(len(STORE_MAGIC)) == STORE_MAGIC
+        games = store_games(source) if is_store else selfplay_games(source, plies)
+        count_games(games, plies, counts)
+    return write_book(output, counts, min_games)
+
+
+class OpeningBook:
+    """Looks up the book moves of positions by binary search over a memory-mapped book file.
+    Use it as a context manager, or call close.
+
+    Attributes:
+        book_map: The mmap of the book file, or None if the book has no entries.
+        entries: The number of entries.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Opens and maps the book at the path.
+
+        Raises:
+            ValueError: If the file is not a book
+        """
+        self._book_map = None
+        with open(path, "rb") as book_file:
+            if book_file.read(len(BOOK_MAGIC)) != BOOK_MAGIC:
+                raise ValueError(f"Not an opening book: {path}")
+            book_file.seek(0, 2)
+            self._entries = (book_file.tell() - len(BOOK_MAGIC)) // BOOK_ENTRY.size
+            if self._entries:
+                self._book_map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the book file."""
+        if self._book_map is not None:
+            self._book_map.close()
+            self._book_map = None
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def _key(self, entry: int) -> int:
+        """Returns the position key of an entry"""
+        return _KEY.unpack_from(self._book_map, len(BOOK_MAGIC) + entry * BOOK_ENTRY.size)[0]
+
+    def probe(self, game: ChessVar) -> list[BookMove]:
+        """Returns the book moves of the position of a game, most played first, or an empty list"""
+        if self._book_map is None or game.get_game_state() != "UNFINISHED":
+            return []
+        key = game.get_zobrist_key()
+        # find the first entry of the key
+        low, high = 0, self._entries
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        book_moves = []
+        for entry in range(low, self._entries):
+            entry_key, *fields = BOOK_ENTRY.unpack_from(self._book_map, len(BOOK_MAGIC) + entry * BOOK_ENTRY.size)
+            if entry_key != key:
+                break
+            book_moves.append(BookMove(*fields))
+        # a key collision could point to moves of another position
+        legal_moves = game.legal_moves()
+        book_moves = [book_move for book_move in book_moves if book_move.move in legal_moves]
+        book_moves.sort(key=lambda book_move: book_move.games, reverse=True)
+        return book_moves
+
+    def choose_move(self, game: ChessVar, rng: Optional[random.Random] = None) -> Optional[int]:
+        """Returns a book move of the position, chosen at random in proportion to how often it was played,
+        or the most played move if rng is None. Returns None if the position is not in the book.
+        """
+        book_moves = self.probe(game)
+        if not book_moves:
+            return None
+        if rng is None:
+            return book_moves[0].move
+        return rng.choices(book_moves, weights=[book_move.games for book_move in book_moves])[0].move
+
+
+def main() -> None:
+    """Builds a book or lists the book moves of a position from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="build a book from game stores and self-play files")
+    build_parser.add_argument("output")
+    build_parser.add_argument("sources", nargs="+")
+    build_parser.add_argument("--plies", type=int, default=16, help="moves of each game to add to the book")
+    build_parser.add_argument("--min-games", type=int, default=1, help="games a move needs to be kept")
+    probe_parser = subparsers.add_parser("probe", help="list the book moves of a position")
+    probe_parser.add_argument("book")
+    probe_parser.add_argument("fen", nargs="*", help="a position written by ChessVar.to_fen, the start by default")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(f"{build_book(args.output, args.sources, args.plies, args.min_games)} entries written")
+    else:
+        game = ChessVar.from_fen(" ".join(args.fen), "bitboards") if args.fen else ChessVar("bitboards")
+        with OpeningBook(args.book) as book:
+            for book_move in book.probe(game):
+                print(f"{'-'.join(move_to_coordinates(book_move.move)):<8} {book_move.games:>8} games  "
+                      f"{book_move.white_wins:>8} white  {book_move.black_wins:>8} black  "
+                      f"{book_move.unfinished:>8} unfinished")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Alpha-beta search engine for ChessVar games."""
+import time
+from typing import NamedTuple, Optional
+
+from ChessVar import ChessVar, EXPLOSION_MASKS, MOVE_CAPTURE, MOVE_KILLS_KING, PAWN, move_to_coordinates
+
+
+# material values of the piece types in centipawns, indexed by piece type
+PIECE_VALUES = (100, 300, 300, 500, 900, 0)
+
+# scores are from the point of view of the current player
+# a won game scores WIN_SCORE minus the number of plies it takes, so faster wins score higher
+WIN_SCORE = 100000
+WIN_THRESHOLD = WIN_SCORE - 1000
+INFINITY = 1000000
+
+# transposition table bound types
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class SearchResult(NamedTuple):
+    """The outcome of a search.
+
+    Attributes:
+        move: The best packed move, or None if the current player has no legal moves
+        score: The score of the best move in centipawns from the point of view of the current player
+        depth: The deepest fully completed search depth
+        nodes: The number of positions visited
+    """
+    move: Optional[int]
+    score: int
+    depth: int
+    nodes: int
+
+    def coordinates(self) -> Optional[tuple[str, str]]:
+        """Returns the best move as move_from and move_to coordinates for ChessVar.make_move."""
+        return None if self.move is None else move_to_coordinates(self.move)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time limit runs out."""
+
+
+def evaluate(game: ChessVar) -> int:
+    """Returns the material balance in centipawns from the point of view of the current player."""
+    piece_bitboards = game.get_piece_bitboards()
+    score = 0
+    for piece_type in range(5):
+        score += PIECE_VALUES[piece_type] * (
+            piece_bitboards[piece_type].bit_count() - piece_bitboards[6 + piece_type].bit_count()
+        )
+    return score if game.get_current_player() == "white" else -score
+
+
+def explosion_gain(piece_bitboards: tuple[int, ...], move: int) -> int:
+    """Returns the material a capture destroys, opposing pieces minus own pieces, in centipawns.
+    The attacking piece is destroyed in the explosion, so it counts as lost.
+    """
+    from_square = move & 63
+    to_square = move >> 6 & 63
+    from_bit = 1 << from_square
+    color_offset = 0
+    for piece_code in range(12):
+        if piece_bitboards[piece_code] & from_bit:
+            color_offset = piece_code // 6 * 6
+            break
+    occupied = 0
+    for bitboard in piece_bitboards:
+        occupied |= bitboard
+    pawns = piece_bitboards[PAWN] | piece_bitboards[6 + PAWN]
+    removed = EXPLOSION_MASKS[to_square] & occupied & ~pawns | 1 << to_square | from_bit
+    gain = 0
+    for piece_type in range(5):
+        gain -= PIECE_VALUES[piece_type] * (piece_bitboards[color_offset + piece_type] & removed).bit_count()
+        gain += PIECE_VALUES[piece_type] * (piece_bitboards[6 - color_offset + piece_type] & removed).bit_count()
+    return gain
+
+
+def _score_to_table(score: int, ply: int) -> int:
+    """Converts a win score from distance to the root into distance to the current node"""
+    if score > WIN_THRESHOLD:
+        return score + ply
+    if score < -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score: int, ply: int) -> int:
+    """Converts a win score from distance to the stored node into distance to the root"""
+    if score > WIN_THRESHOLD:
+        return score - ply
+    if score < -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+class Engine:
+    """An iterative deepening alpha-beta search engine with a transposition table.
+    The transposition table is kept between searches, so one Engine can follow a whole game.
+
+    Attributes:
+        table: A dictionary from zobrist keys to (depth, score, bound, best move) entries.
+        table_size: The number of entries after which the table is cleared.
+        killers: A list of the two most recent quiet moves that caused a cutoff at each ply.
+        nodes: The number of positions visited by the current search.
+        deadline: The perf_counter time at which the current search stops, or None.
+    """
+
+    def __init__(self, table_size: int = 1_000_000) -> None:
+        """Initializes the engine with an empty transposition table."""
+        self._table = {}
+        self._table_size = table_size
+        self._killers = []
+        self._nodes = 0
+        self._deadline = None
+
+    def clear(self) -> None:
+        """Empties the transposition table."""
+        self._table.clear()
+
+    def search(self, game: ChessVar, depth: Optional[int] = None,
+               time_limit: Optional[float] = None, beta: int = INFINITY) -> SearchResult:
+        """Searches the position with iterative deepening until the depth or the time limit is reached.
+        The game is left unchanged.
+
+        Args:
+            game: The ChessVar game to search, in either representation
+            depth: The deepest depth in plies to search
+            time_limit: The number of seconds after which the search stops
+            beta: A score the caller can already reach elsewhere, so a score of at least beta
+                is only searched until it is proven and is a lower bound
+        Returns:
+            A SearchResult of the deepest completed iteration
+        """
+        if depth is None and time_limit is None:
+            raise ValueError("search needs a depth or a time_limit")
+        if len(self._table) > self._table_size:
+            self._table.clear()
+        self._nodes = 0
+        self._deadline = None if time_limit is None else time.perf_counter() + time_limit
+        max_depth = depth if depth is not None else 64
+
+        moves = list(game.legal_moves())
+        if not moves:
+            return SearchResult(None, self._terminal_score(game, 0), 0, 0)
+        result = SearchResult(moves[0], 0, 0, 0)
+        for current_depth in range(1, max_depth + 1):
+            self._killers = [[0, 0] for _ in range(current_depth + 1)]
+            try:
+                best_move, best_score = self._search_root(game, moves, current_depth, beta)
+            except SearchTimeout:
+                break
+            result = SearchResult(best_move, best_score, current_depth, self._nodes)
+            # search the best move first in the next iteration
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+            if abs(best_score) > WIN_THRESHOLD:
+                break
+        return result._replace(nodes=self._nodes)
+
+    def _search_root(self, game: ChessVar, moves: list[int], depth: int, beta: int) -> tuple[int, int]:
+        """Searches the root moves to the depth until one reaches beta and returns the best move and its score"""
+        alpha = -INFINITY
+        best_move = moves[0]
+        for move in moves:
+            game.push_move(move)
+            try:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, 1)
+            finally:
+                game.unmake_move()
+            if score > alpha:
+                alpha = score
+                best_move = move
+                if alpha >= beta:
+                    break
+        bound = EXACT if alpha < beta else LOWER_BOUND
+        self._table[game.get_zobrist_key()] = (depth, _score_to_table(alpha, 0), bound, best_move)
+        return best_move, alpha
+
+    def _tick(self) -> None:
+        """Counts a visited position and stops the search when the time limit has run out"""
+        self._nodes += 1
+        if self._deadline is not None and not self._nodes & 1023 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+
+    @staticmethod
+    def _terminal_score(game: ChessVar, ply: int) -> int:
+        """Scores a position without legal moves, a loss if the game was won by the opposing player"""
+        game_state = game.get_game_state()
+        if game_state == "UNFINISHED":
+            return 0
+        winner = "white" if game_state == "WHITE_WON" else "black"
+        return WIN_SCORE - ply if winner == game.get_current_player() else -(WIN_SCORE - ply)
+
+    def _negamax(self, game: ChessVar, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """Returns the alpha-beta score of the position from the point of view of the current player"""
+        self._tick()
+        if game.get_game_state() != "UNFINISHED":
+            return self._terminal_score(game, ply)
+        if depth <= 0:
+            return self._quiescence(game, alpha, beta, ply)
+
+        # probe the transposition table
+        key = game.get_zobrist_key()
+        entry = self._table.get(key)
+        table_move = 0
+        if entry is not None:
+            entry_depth, entry_score, bound, table_move = entry
+            if entry_depth >= depth:
+                score = _score_from_table(entry_score, ply)
+                if bound == EXACT:
+                    return score
+                if bound == LOWER_BOUND and score >= beta:
+                    return score
+                if bound == UPPER_BOUND and score <= alpha:
+                    return score
+
+        moves = self._ordered_moves(game, table_move, ply)
+        if not moves:
+            return self._terminal_score(game, ply)
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = moves[0]
+        for move in moves:
+            game.push_move(move)
+            try:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not move >> 12 & MOVE_CAPTURE and ply < len(self._killers):
+                            killers = self._killers[ply]
+                            if killers[0] != move:
+                                killers[1] = killers[0]
+                                killers[0] = move
+                        break
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self._table[key] = (depth, _score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiescence(self, game: ChessVar, alpha: int, beta: int, ply: int) -> int:
+        """Searches only captures until the position is quiet, so explosions are never cut off halfway"""
+        stand_pat = evaluate(game)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        piece_bitboards = game.get_piece_bitboards()
+        # captures that destroy more material than they win are left out
+        captures = []
+        for move in game.legal_moves():
+            if move >> 12 & MOVE_CAPTURE:
+                order = self._capture_order(piece_bitboards, move)
+                if order >= 0:
+                    captures.append((order, move))
+        captures.sort(reverse=True)
+        for _, move in captures:
+            self._tick()
+            game.push_move(move)
+            try:
+                if game.get_game_state() != "UNFINISHED":
+                    score = -self._terminal_score(game, ply + 1)
+                else:
+                    score = -self._quiescence(game, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move()
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    @staticmethod
+    def _capture_order(piece_bitboards: tuple[int, ...], move: int) -> int:
+        """Returns the ordering key of a capture: king explosions first, then by material destroyed"""
+        if move >> 12 & MOVE_KILLS_KING:
+            return INFINITY
+        return explosion_gain(piece_bitboards, move)
+
+    def _ordered_moves(self, game: ChessVar, table_move: int, ply: int) -> list[int]:
+        """Returns the legal moves in search order: the table move, king explosions,
+        other captures by the material they destroy, killer moves, and then the remaining quiet moves
+        """
+        piece_bitboards = game.get_piece_bitboards()
+        killers = self._killers[ply] if ply < len(self._killers) else (0, 0)
+        ordered = []
+        for move in game.legal_moves():
+            if move == table_move:
+                order = 2 * INFINITY
+            elif move >> 12 & MOVE_CAPTURE:
+                order = INFINITY // 2 + self._capture_order(piece_bitboards, move)
+            elif move == killers[0]:
+                order = 2
+            elif move == killers[1]:
+                order = 1
+            else:
+                order = 0
+            ordered.append((order, move))
+        ordered.sort(reverse=True)
+        return [move for _, move in ordered]
+
+
+def search(game: ChessVar, depth: Optional[int] = None, time_limit: Optional[float] = None) -> SearchResult:
+    """Searches the position with a new Engine, see Engine.search."""
+    return Engine().search(game, depth, time_limit)
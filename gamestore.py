@@ -0,0 +1,270 @@
+"""An append-only, memory-mapped store of complete ChessVar games.
+
+A store is a data file and an index file next to it with the added suffix ".idx".
+The data file starts with STORE_MAGIC followed by one record per game:
+the 25-byte binary start position of ChessVar.to_bytes, the game state code of the final position,
+a little-endian uint16 move count, and the packed moves as little-endian uint16 values.
+The index file holds the little-endian uint64 offset of every record in the data file.
+
+Run "python gamestore.py import selfplay.jsonl games.store" to convert self-play output into a store,
+and "python gamestore.py info games.store" to summarize a store.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+from ChessVar import GAME_STATES, POSITION_BYTES, ChessVar
+from selfplay import opening_moves
+
+
+STORE_MAGIC = b"ATOMGS1\n"
+# start position, game state code, and move count
+RECORD_HEADER = struct.Struct(f"<{POSITION_BYTES}sBH")
+STARTING_POSITION = ChessVar("bitboards").to_bytes()
+
+
+def index_path(path: str) -> str:
+    """Returns the path of the index file of a store"""
+    return path + ".idx"
+
+
+class GameRecord(NamedTuple):
+    """A game of a GameStoreReader. The fields are views into the memory-mapped file, so nothing is copied
+    until the game is replayed. The views are only valid while the reader is open.
+
+    Attributes:
+        start_position: The binary start position, see ChessVar.from_bytes
+        game_state: The game state after the last move
+        moves: A memoryview of the packed moves as unsigned 16-bit integers
+    """
+    start_position: memoryview
+    game_state: str
+    moves: memoryview
+
+    def replay(self, representation: str = "bitboards", plies: Optional[int] = None) -> ChessVar:
+        """Returns a new game with the first plies moves made from the start position, all of them if None"""
+        game = ChessVar.from_bytes(bytes(self.start_position), representation)
+        for move in self.moves[:plies]:
+            game.push_move(move)
+        return game
+
+    def positions(self, representation: str = "bitboards") -> Iterator[ChessVar]:
+        """Yields the same game after each move, starting with the start position"""
+        game = ChessVar.from_bytes(bytes(self.start_position), representation)
+        yield game
+        for move in self.moves:
+            game.push_move(move)
+            yield game
+
+
+class GameStoreWriter:
+    """Appends games to a store, creating it if it does not exist. Use it as a context manager,
+    or call close, so the buffered records reach the files.
+
+    Attributes:
+        data_file: The data file opened for appending.
+        index_file: The index file opened for appending.
+        offset: The offset in the data file of the next record.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Opens the store at the path for appending."""
+        self._data_file = open(path, "ab")
+        self._index_file = open(index_path(path), "ab")
+        self._offset = self._data_file.tell()
+        if self._offset == 0:
+            self._data_file.write(STORE_MAGIC)
+            self._offset = len(STORE_MAGIC)
+
+    def __enter__(self) -> "GameStoreWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, moves: Sequence[int], game_state: str, start_position: bytes = STARTING_POSITION) -> int:
+        """Appends a game.
+
+        Args:
+            moves: The packed moves of the game, as returned by ChessVar.legal_moves
+            game_state: The game state after the last move
+            start_position: The binary start position, the starting position by default
+        Returns:
+            The index of the game in the store
+        """
+        if len(moves) > 0xFFFF:
+            raise ValueError(f"A game can hold at most {0xFFFF} moves, not {len(moves)}")
+        record = RECORD_HEADER.pack(start_position, GAME_STATES.index(game_state), len(moves))
+        move_array = array("H", moves)
+        if sys.byteorder != "little":
+            move_array.byteswap()
+        self._data_file.write(record)
+        self._data_file.write(move_array.tobytes())
+        self._index_file.write(self._offset.to_bytes(8, "little"))
+        self._offset += len(record) + 2 * len(moves)
+        return self._index_file.tell() // 8 - 1
+
+    def append_game(self, game: ChessVar) -> int:
+        """Appends the moves of a game that can be taken back, starting from the position before the first one.
+        The moves are taken back and made again, so the game ends in the same position.
+
+        Returns:
+            The index of the game in the store
+        """
+        moves = game.get_move_history()
+        for _ in moves:
+            game.unmake_move()
+        start_position = game.to_bytes()
+        for move in moves:
+            game.push_move(move)
+        return self.append(moves, game.get_game_state(), start_position)
+
+    def flush(self) -> None:
+        """Writes the buffered records to the files, data first so the index never points past the data."""
+        self._data_file.flush()
+        self._index_file.flush()
+
+    def close(self) -> None:
+        """Flushes and closes the files."""
+        if not self._data_file.closed:
+            self.flush()
+            self._data_file.close()
+            self._index_file.close()
+
+
+class GameStoreReader:
+    """Reads the games of a store through memory maps, without loading the files into memory.
+    Supports len, indexing by game number, and iteration. Use it as a context manager, or call close.
+
+    Attributes:
+        data_map: The mmap of the data file, or None if the store has no games.
+        index_map: The mmap of the index file, or None if the store has no games.
+        offsets: A memoryview of the record offsets in the index file.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Opens and maps the store at the path.
+
+        Raises:
+            ValueError: If the data file is not a store
+        """
+        self._data_map = self._index_map = None
+        self._offsets = memoryview(b"").cast("Q")
+        with open(index_path(path), "rb") as index_file:
+            if os.fstat(index_file.fileno()).st_size >= 8:
+                self._index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(path, "rb") as data_file:
+            if data_file.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError(f"Not a game store: {path}")
+            if self._index_map is not None:
+                self._data_map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._index_map is not None:
+            count = len(self._index_map) // 8
+            self._offsets = memoryview(self._index_map)[:count * 8].cast("Q")
+        self._little_endian = sys.byteorder == "little"
+
+    def __enter__(self) -> "GameStoreReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Releases the views and unmaps the files."""
+        self._offsets.release()
+        for file_map in (self._data_map, self._index_map):
+            if file_map is not None:
+                try:
+                    file_map.close()
+                except BufferError:
+                    # GameRecord views are still held, the map is closed when the last one is released
+                    pass
+        self._data_map = self._index_map = None
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def _offset(self, index: int) -> int:
+        """Returns the data file offset of a record from the little-endian index"""
+        offset = self._offsets[index]
+        return offset if self._little_endian else int.from_bytes(offset.to_bytes(8, sys.byteorder), "little")
+
+    def __getitem__(self, index: int) -> GameRecord:
+        """Returns the game with the index as a GameRecord.
+
+        Raises:
+            IndexError: If there is no game with the index
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"No game {index} in a store of {len(self)} games")
+        offset = self._offset(index)
+        data = memoryview(self._data_map)
+        start_position, state_code, move_count = RECORD_HEADER.unpack_from(data, offset)
+        moves_offset = offset + RECORD_HEADER.size
+        moves = data[moves_offset:moves_offset + 2 * move_count]
+        if self._little_endian:
+            moves = moves.cast("H")
+        else:
+            moves = array("H", moves)
+            moves.byteswap()
+            moves = memoryview(moves)
+        return GameRecord(data[offset:offset + POSITION_BYTES], GAME_STATES[state_code], moves)
+
+    def game_state(self, index: int) -> str:
+        """Returns the final game state of a game without creating its views"""
+        return GAME_STATES[self._data_map[self._offset(index) + POSITION_BYTES]]
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+def import_json_lines(json_path: str, store_path: str) -> int:
+    """Appends the games of a selfplay.py JSON lines file to a store.
+
+    Returns:
+        The number of games appended
+    """
+    count = 0
+    with open(json_path) as json_file, GameStoreWriter(store_path) as writer:
+        for line in json_file:
+            record = json.loads(line)
+            game = ChessVar("bitboards")
+            moves = opening_moves(game, tuple(record["moves"]))
+            writer.append(moves, game.get_game_state())
+            count += 1
+    return count
+
+
+def main() -> None:
+    """Imports self-play games into a store or summarizes a store from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="append the games of a selfplay.py JSON lines file")
+    import_parser.add_argument("json_path")
+    import_parser.add_argument("store_path")
+    info_parser = subparsers.add_parser("info", help="count the games, moves, and results of a store")
+    info_parser.add_argument("store_path")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        print(f"{import_json_lines(args.json_path, args.store_path)} games imported")
+    else:
+        with GameStoreReader(args.store_path) as reader:
+            results = Counter(reader.game_state(index) for index in range(len(reader)))
+            moves = sum(len(record.moves) for record in reader)
+            print(f"{len(reader)} games, {moves} moves")
+            for game_state, count in results.most_common():
+                print(f"{game_state:<12} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Opt-in call counters, timers, and explosion statistics for ChessVar.
+
+enable() wraps the instrumented methods of ChessVar, and disable() puts the original methods back,
+so nothing is added to a run that never enables it:
+
+    import instrumentation
+    instrumentation.enable()
+    ...
+    print(instrumentation.snapshot())
+
+start_exporter writes a snapshot every few seconds to a JSON lines file or passes it to a callback.
+"""
+import functools
+import json
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional
+
+from ChessVar import PIECE_NAMES, ChessVar
+
+
+# ChessVar methods that are counted and timed. resolve_capture removes the pieces of every explosion,
+# in place of remove_battle_pieces, get_surrounding_squares, and remove_exploded_pieces, which no move calls.
+CHESSVAR_METHODS = (
+    "make_move", "push_move", "unmake_move", "apply_moves", "generate_legal_moves", "is_valid_move",
+    "check_move", "resolve_capture",
+)
+# move generation of one piece, counted and timed by piece type under these labels.
+# Only pieces whose cached moves were dropped are generated again, see ChessVar.generate_legal_moves
+PIECE_MOVES_LABELS = tuple(f"generate_piece_moves.{piece_name}" for piece_name in PIECE_NAMES)
+
+_calls = Counter()
+_nanoseconds = Counter()
+# number of pieces removed by each explosion, including the attacking and captured pieces
+_explosion_sizes = Counter()
+# (class, method name, original class attribute) of every wrapped method
+_originals = []
+_lock = threading.Lock()
+
+
+def _timed(label: str, function: Callable) -> Callable:
+    """Returns a wrapper of the function that counts and times its calls under the label"""
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _nanoseconds[label] += perf_counter_ns() - start
+            _calls[label] += 1
+    return wrapper
+
+
+def _timed_resolve_capture(function: Callable) -> Callable:
+    """Returns a timed wrapper of ChessVar.resolve_capture that also records the size of each explosion"""
+    timed_function = _timed("resolve_capture", function)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        removed_pieces = timed_function(*args, **kwargs)
+        if removed_pieces is not None:
+            _explosion_sizes[len(removed_pieces)] += 1
+        return removed_pieces
+    return wrapper
+
+
+def _timed_piece_moves(function: Callable) -> Callable:
+    """Returns a wrapper of ChessVar._generate_piece_moves that counts and times its calls by piece type"""
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(self, piece_code, from_square):
+        start = perf_counter_ns()
+        try:
+            return function(self, piece_code, from_square)
+        finally:
+            label = PIECE_MOVES_LABELS[piece_code % 6]
+            _nanoseconds[label] += perf_counter_ns() - start
+            _calls[label] += 1
+    return wrapper
+
+
+def _wrap(owner: type, name: str, label: str) -> None:
+    """Replaces a method of the class with a timed wrapper"""
+    original = owner.__dict__[name]
+    if name == "resolve_capture":
+        wrapped = _timed_resolve_capture(original)
+    elif name == "_generate_piece_moves":
+        wrapped = _timed_piece_moves(original)
+    else:
+        wrapped = _timed(label, original)
+    _originals.append((owner, name, original))
+    setattr(owner, name, wrapped)
+
+
+def is_enabled() -> bool:
+    """Returns true while the methods are instrumented."""
+    return bool(_originals)
+
+
+def enable() -> None:
+    """Wraps the instrumented methods. Does nothing if they are already wrapped."""
+    with _lock:
+        if _originals:
+            return
+        for name in CHESSVAR_METHODS:
+            _wrap(ChessVar, name, name)
+        _wrap(ChessVar, "_generate_piece_moves", "generate_piece_moves")
+
+
+def disable() -> None:
+    """Puts the original methods back. The collected counts are kept until reset."""
+    with _lock:
+        while _originals:
+            owner, name, original = _originals.pop()
+            setattr(owner, name, original)
+
+
+def reset() -> None:
+    """Clears the collected counts."""
+    _calls.clear()
+    _nanoseconds.clear()
+    _explosion_sizes.clear()
+
+
+def snapshot() -> dict:
+    """Returns a copy of the collected counts.
+
+    Returns:
+        A dictionary with "calls" and "seconds" dictionaries keyed by method,
+        "explosion_sizes" from pieces removed to explosion count, and the totals "explosions" and "pieces_destroyed"
+    """
+    explosion_sizes = dict(sorted(_explosion_sizes.items()))
+    return {
+        "calls": dict(_calls),
+        "seconds": {label: nanoseconds / 1e9 for label, nanoseconds in _nanoseconds.items()},
+        "explosion_sizes": explosion_sizes,
+        "explosions": sum(explosion_sizes.values()),
+        "pieces_destroyed": sum(size * count for size, count in explosion_sizes.items()),
+    }
+
+
+class Exporter:
+    """Exports a snapshot at a fixed interval from a daemon thread until stopped.
+
+    Attributes:
+        interval: The number of seconds between exports.
+        path: The JSON lines file each snapshot is appended to, or None.
+        callback: A function each snapshot is passed to, or None.
+        stopped: A threading.Event that is set to stop the thread.
+        thread: The exporting daemon thread.
+    """
+
+    def __init__(self, interval: float, path: Optional[str] = None,
+                 callback: Optional[Callable[[dict], None]] = None) -> None:
+        """Initializes the exporter and starts its thread."""
+        if path is None and callback is None:
+            raise ValueError("Exporter needs a path or a callback")
+        self._interval = interval
+        self._path = path
+        self._callback = callback
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="instrumentation-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Exports until stopped, and once more when stopped"""
+        while not self._stopped.wait(self._interval):
+            self.export()
+        self.export()
+
+    def export(self) -> None:
+        """Exports one timestamped snapshot."""
+        current = snapshot()
+        current["time"] = time.time()
+        if self._path is not None:
+            with open(self._path, "a") as export_file:
+                export_file.write(json.dumps(current) + "\n")
+        if self._callback is not None:
+            self._callback(current)
+
+    def stop(self) -> None:
+        """Stops the thread after a final export."""
+        self._stopped.set()
+        self._thread.join()
+
+
+def start_exporter(interval: float = 10.0, path: Optional[str] = None,
+                   callback: Optional[Callable[[dict], None]] = None) -> Exporter:
+    """Starts exporting snapshots every interval seconds to a JSON lines file, a callback, or both."""
+    return Exporter(interval, path, callback)
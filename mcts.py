@@ -0,0 +1,295 @@
+"""Monte Carlo tree search engine for ChessVar games.
+
+Run "python mcts.py --iterations 2000" to search the starting position or a FEN and print the playouts per second,
+adding "--workers 4" to run the playouts of every batch across worker processes.
+"""
+import argparse
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+from ChessVar import BLACK, MOVE_CAPTURE, MOVE_KILLS_KING, WHITE, ChessVar, move_to_coordinates
+
+
+DEFAULT_EXPLORATION = 1.4
+# the chance that a playout move is a capture when one is available and no capture explodes a king
+CAPTURE_PREFERENCE = 0.5
+# the reward of a playout that ends without a winner
+DRAW_REWARD = 0.5
+
+
+class MCTSResult(NamedTuple):
+    """The outcome of a tree search.
+
+    Attributes:
+        move: The most visited packed move, or a move that explodes a king,
+            or None if the current player has no legal moves
+        visits: The number of iterations through the move
+        value: The mean reward of the move for the current player, from 0 for a loss to 1 for a win
+        iterations: The number of iterations below the root, including those of a reused tree
+    """
+    move: Optional[int]
+    visits: int
+    value: float
+    iterations: int
+
+    def coordinates(self) -> Optional[tuple[str, str]]:
+        """Returns the move as move_from and move_to coordinates for ChessVar.make_move."""
+        return None if self.move is None else move_to_coordinates(self.move)
+
+
+def playout(game: ChessVar, max_plies: int, rng: random.Random) -> str:
+    """Plays fast random moves until the game is over or max_plies moves were made, then takes them back.
+    A move that explodes a king is always played, and captures are preferred, see CAPTURE_PREFERENCE.
+
+    Returns:
+        The game state at the end of the playout
+    """
+    plies = 0
+    while plies < max_plies:
+        moves = game.legal_moves()
+        if not moves:
+            break
+        captures = [move for move in moves if move >> 12 & MOVE_CAPTURE]
+        king_captures = [move for move in captures if move >> 12 & MOVE_KILLS_KING]
+        if king_captures:
+            move = rng.choice(king_captures)
+        elif captures and rng.random() < CAPTURE_PREFERENCE:
+            move = rng.choice(captures)
+        else:
+            move = rng.choice(moves)
+        game.push_move(move)
+        plies += 1
+    game_state = game.get_game_state()
+    for _ in range(plies):
+        game.unmake_move()
+    return game_state
+
+
+def run_playouts(positions: list[bytes], max_plies: int, seed: int) -> list[str]:
+    """Runs one playout from each binary position, see ChessVar.to_bytes, and returns their final game states"""
+    rng = random.Random(seed)
+    return [playout(ChessVar.from_bytes(position, "bitboards"), max_plies, rng) for position in positions]
+
+
+class _Node:
+    """A position of the search tree.
+
+    Attributes:
+        move: The packed move that leads to the node, None for the root
+        parent: The parent node, None for the root
+        key: The zobrist key of the position
+        mover: The color index of the player who made the move, who the rewards are counted for
+        children: The expanded child nodes
+        untried: The legal moves without a child node, None until the node is first expanded
+        visits: The number of iterations through the node, including those whose playouts are still running
+        rewards: The sum of the playout rewards for the mover
+    """
+    __slots__ = ("move", "parent", "key", "mover", "children", "untried", "visits", "rewards")
+
+    def __init__(self, move: Optional[int], parent: Optional["_Node"], key: int, mover: int) -> None:
+        self.move = move
+        self.parent = parent
+        self.key = key
+        self.mover = mover
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.rewards = 0.0
+
+
+class MCTSEngine:
+    """A UCT tree search that runs its playouts in batches, in this process or across worker processes.
+    The tree is kept between searches, so a search of a position reached by one or two moves
+    from the last searched position continues from the matching subtree.
+    Use it as a context manager, or call close, when it has workers.
+
+    Attributes:
+        exploration: The UCT exploration constant.
+        batch_size: The number of leaves selected before their playouts are run.
+        max_playout_plies: The number of moves after which a playout counts as a draw.
+        workers: The number of worker processes for the playouts, 1 to run them in this process.
+        executor: The ProcessPoolExecutor of the workers, started on the first search that needs it.
+        rng: The random.Random of the tree and playout choices.
+        root: The root node of the last search, or None.
+    """
+
+    def __init__(self, exploration: float = DEFAULT_EXPLORATION, batch_size: int = 16, max_playout_plies: int = 100,
+                 workers: int = 1, seed: Optional[int] = None) -> None:
+        """Initializes the engine without a tree."""
+        self._exploration = exploration
+        self._batch_size = batch_size
+        self._max_playout_plies = max_playout_plies
+        self._workers = workers
+        self._executor = None
+        self._rng = random.Random(seed)
+        self._root = None
+
+    def __enter__(self) -> "MCTSEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def clear(self) -> None:
+        """Discards the search tree."""
+        self._root = None
+
+    def _find_root(self, key: int) -> Optional[_Node]:
+        """Returns the node of the last tree with the zobrist key, at most two moves below its root"""
+        if self._root is None:
+            return None
+        if self._root.key == key:
+            return self._root
+        for child in self._root.children:
+            if child.key == key:
+                return child
+            for grandchild in child.children:
+                if grandchild.key == key:
+                    return grandchild
+        return None
+
+    def _select_child(self, node: _Node) -> _Node:
+        """Returns the child with the highest upper confidence bound"""
+        log_visits = math.log(node.visits)
+        exploration = self._exploration
+        return max(node.children, key=lambda child: child.rewards / child.visits
+                   + exploration * math.sqrt(log_visits / child.visits))
+
+    def _select_leaf(self, root: _Node, game: ChessVar) -> tuple[_Node, Optional[str]]:
+        """Walks from the root to a leaf, expanding one new child, and makes the moves on the game.
+        The visits of the path are counted right away, so the other leaves of a batch take other paths.
+
+        Returns:
+            The leaf and the game state at the leaf if it needs no playout, otherwise None
+        """
+        node = root
+        while True:
+            if node.untried is None:
+                node.untried = list(game.legal_moves())
+            if node.untried or not node.children:
+                break
+            node = self._select_child(node)
+            game.push_move(node.move)
+        if node.untried:
+            move = node.untried.pop(self._rng.randrange(len(node.untried)))
+            mover = WHITE if game.get_current_player() == "white" else BLACK
+            game.push_move(move)
+            child = _Node(move, node, game.get_zobrist_key(), mover)
+            node.children.append(child)
+            node = child
+        path_node = node
+        while path_node is not None:
+            path_node.visits += 1
+            path_node = path_node.parent
+        game_state = game.get_game_state()
+        if game_state == "UNFINISHED" and game.legal_moves():
+            return node, None
+        return node, game_state
+
+    @staticmethod
+    def _backpropagate(node: _Node, game_state: str) -> None:
+        """Adds the reward of a finished iteration to the leaf and its ancestors, whose visits are already counted"""
+        winner = None if game_state == "UNFINISHED" else (WHITE if game_state == "WHITE_WON" else BLACK)
+        while node is not None:
+            node.rewards += DRAW_REWARD if winner is None else float(node.mover == winner)
+            node = node.parent
+
+    def _run_batch(self, positions: list[bytes]) -> list[str]:
+        """Runs the playouts of a batch of positions, split over the workers if there are several"""
+        if self._workers <= 1 or len(positions) < 2:
+            return run_playouts(positions, self._max_playout_plies, self._rng.getrandbits(32))
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self._workers)
+        chunk_size = -(-len(positions) // self._workers)
+        futures = [
+            self._executor.submit(run_playouts, positions[start:start + chunk_size], self._max_playout_plies,
+                                  self._rng.getrandbits(32))
+            for start in range(0, len(positions), chunk_size)
+        ]
+        return [game_state for future in futures for game_state in future.result()]
+
+    def search(self, game: ChessVar, iterations: Optional[int] = None,
+               time_limit: Optional[float] = None) -> MCTSResult:
+        """Searches the position for a number of iterations or for the time limit, whichever ends first.
+        The game itself is not changed.
+
+        Args:
+            game: The game to search
+            iterations: The number of new iterations to run
+            time_limit: The number of seconds after which no new batch is started,
+                though a position without a tree always gets one batch
+        Returns:
+            An MCTSResult of the most visited move, or of a move that explodes a king
+        """
+        if iterations is None and time_limit is None:
+            raise ValueError("search needs iterations or a time_limit")
+        if not game.legal_moves():
+            return MCTSResult(None, 0, 0.0, 0)
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        root = self._find_root(game.get_zobrist_key())
+        if root is None:
+            mover = BLACK if game.get_current_player() == "white" else WHITE
+            root = _Node(None, None, game.get_zobrist_key(), mover)
+        root.parent = None
+        self._root = root
+        search_game = ChessVar.from_bytes(game.to_bytes(), "bitboards")
+        completed = 0
+        # a new root gets at least one batch, so there is a child to return
+        while not root.children or ((iterations is None or completed < iterations)
+                                    and (deadline is None or time.perf_counter() < deadline)):
+            batch_size = self._batch_size if iterations is None else max(1, min(self._batch_size,
+                                                                                iterations - completed))
+            leaves = []
+            positions = []
+            for _ in range(batch_size):
+                leaf, game_state = self._select_leaf(root, search_game)
+                if game_state is None:
+                    leaves.append(leaf)
+                    positions.append(search_game.to_bytes())
+                else:
+                    self._backpropagate(leaf, game_state)
+                while search_game.unmake_move():
+                    pass
+            for leaf, game_state in zip(leaves, self._run_batch(positions)):
+                self._backpropagate(leaf, game_state)
+            completed += batch_size
+        # a move that explodes a king wins at once, however often its siblings were visited
+        best = max(root.children, key=lambda child: (bool(child.move >> 12 & MOVE_KILLS_KING), child.visits))
+        return MCTSResult(best.move, best.visits, best.rewards / best.visits, root.visits)
+
+
+def main() -> None:
+    """Searches a position from the command line and prints the playouts per second."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fen", nargs="*", help="a position written by ChessVar.to_fen, the start by default")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--time-limit", type=float, help="seconds to search instead of a number of iterations")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the playouts")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    game = ChessVar.from_fen(" ".join(args.fen), "bitboards") if args.fen else ChessVar("bitboards")
+    iterations = None if args.time_limit is not None else args.iterations
+    with MCTSEngine(batch_size=args.batch_size, workers=args.workers, seed=args.seed) as engine:
+        start = time.perf_counter()
+        result = engine.search(game, iterations, args.time_limit)
+        elapsed = time.perf_counter() - start
+    if result.move is None:
+        print("no legal moves")
+        return
+    print(f"best move {'-'.join(result.coordinates())}  visits {result.visits}  value {result.value:.3f}")
+    print(f"{result.iterations} iterations in {elapsed:.2f} s, {result.iterations / elapsed:,.0f} playouts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Multi-core search of ChessVar positions by splitting the root moves over a process pool.
+
+Run "python parallel_search.py" to benchmark the speed-up for growing worker counts.
+"""
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Optional
+
+from ChessVar import ChessVar
+from engine import INFINITY, Engine, SearchResult, WIN_THRESHOLD
+from perft import setup_position
+
+
+# each worker process keeps one engine, so its transposition table is reused across tasks
+_worker_engine = None
+
+
+def _search_child(game_data: bytes, move: int, depth: int, deadline: Optional[float],
+                  beta: int) -> Optional[tuple[int, int, int]]:
+    """Searches the position after the root move to the depth in a worker process.
+
+    Args:
+        game_data: The pickled root game
+        move: The packed root move
+        depth: The depth below the root move
+        deadline: The time.time() value at which every child of the root stops, or None
+        beta: The child beta from _child_beta, INFINITY for an exact score
+    Returns:
+        A tuple of the root move, its score from the point of view of the player making it,
+        and the number of positions visited, or None if the deadline came before the depth was completed.
+        A move that is no better than the score of the child beta gets an upper bound of that score.
+    """
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = Engine()
+    game = pickle.loads(game_data)
+    game.push_move(move)
+    time_limit = None if deadline is None else deadline - time.time()
+    if time_limit is not None and time_limit <= 0:
+        return None
+    result = _worker_engine.search(game, depth, time_limit, beta)
+    # a finished game, or a forced result, ends the search before the depth
+    if result.move is not None and result.depth < depth and abs(result.score) <= WIN_THRESHOLD:
+        return None
+    # the child score is from the opposing player's point of view, one ply further from the root
+    score = -result.score
+    if score > WIN_THRESHOLD:
+        score -= 1
+    elif score < -WIN_THRESHOLD:
+        score += 1
+    return move, score, result.nodes
+
+
+def _child_beta(score: int) -> int:
+    """Returns the beta of a child search below which its root move scores better than score,
+    the reverse of the score conversion in _search_child
+    """
+    if score > WIN_THRESHOLD:
+        return -score - 1
+    if score < -WIN_THRESHOLD:
+        return -score + 1
+    return -score
+
+
+class ParallelEngine:
+    """Searches positions with iterative deepening, handing the root moves of each iteration
+    to a pool of worker processes.
+    The best move of the last iteration is searched first with a full window, and the other moves
+    are then handed out as workers come free, each with the best score so far as its bound,
+    so most of them are only searched until they are proven no better.
+
+    Attributes:
+        workers: The number of worker processes.
+        executor: The ProcessPoolExecutor of the workers, started on the first search.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        """Initializes the engine with a number of workers, by default one for each CPU core."""
+        self._workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    def __enter__(self) -> "ParallelEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shuts down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def search(self, game: ChessVar, depth: Optional[int] = None,
+               time_limit: Optional[float] = None) -> SearchResult:
+        """Searches the position to the depth or for the time limit, see Engine.search.
+        The first iteration is searched in this process, and every deeper one across the workers.
+        """
+        if depth is None and time_limit is None:
+            raise ValueError("search needs a depth or a time_limit")
+        moves = list(game.legal_moves())
+        if self._workers == 1 or len(moves) < 2 or depth is not None and depth < 2:
+            return Engine().search(game, depth, time_limit)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self._workers)
+
+        # one deadline for the whole search, however many moves each worker gets to
+        deadline = None if time_limit is None else time.time() + time_limit
+        result = Engine().search(game, 1, time_limit)
+        if result.depth == 0 or abs(result.score) > WIN_THRESHOLD:
+            return result
+        nodes = result.nodes
+        game_data = pickle.dumps(game)
+        max_depth = depth if depth is not None else 64
+        for current_depth in range(2, max_depth + 1):
+            # search the best move first in the next iteration
+            moves.remove(result.move)
+            moves.insert(0, result.move)
+            iteration = self._search_iteration(game_data, moves, current_depth - 1, deadline)
+            if iteration is None:
+                break
+            best_move, best_score, iteration_nodes = iteration
+            nodes += iteration_nodes
+            result = SearchResult(best_move, best_score, current_depth, nodes)
+            if abs(best_score) > WIN_THRESHOLD:
+                break
+        return result._replace(nodes=nodes)
+
+    def _search_iteration(self, game_data: bytes, moves: list[int], child_depth: int,
+                          deadline: Optional[float]) -> Optional[tuple[int, int, int]]:
+        """Searches the first root move, then the others across the workers with the best score so far as bound.
+
+        Returns:
+            The best move, its score, and the number of positions visited,
+            or None if the deadline came before every move was searched
+        """
+        first = self._executor.submit(_search_child, game_data, moves[0], child_depth, deadline, INFINITY).result()
+        if first is None:
+            return None
+        best_move, best_score, nodes = first
+        remaining = iter(moves[1:])
+        running = set()
+        timed_out = False
+        while True:
+            while not timed_out and len(running) < self._workers:
+                move = next(remaining, None)
+                if move is None:
+                    break
+                running.add(self._executor.submit(_search_child, game_data, move, child_depth, deadline,
+                                                  _child_beta(best_score)))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                child_result = future.result()
+                if child_result is None:
+                    # the children still running stop at the deadline too
+                    timed_out = True
+                    continue
+                move, score, child_nodes = child_result
+                nodes += child_nodes
+                if score > best_score:
+                    best_move, best_score = move, score
+        if timed_out:
+            return None
+        return best_move, best_score, nodes
+
+
+def parallel_search(game: ChessVar, depth: Optional[int] = None, time_limit: Optional[float] = None,
+                    workers: Optional[int] = None) -> SearchResult:
+    """Searches the position with a new ParallelEngine, see ParallelEngine.search."""
+    with ParallelEngine(workers) as parallel_engine:
+        return parallel_engine.search(game, depth, time_limit)
+
+
+# a quiet queen's gambit middlegame without a forced explosion, so every depth is searched in full
+BENCHMARK_POSITIONS = ((), ("d2-d4", "d7-d5", "c2-c4", "e7-e6", "b1-c3", "g8-f6", "c1-g5", "f8-e7"))
+
+
+def benchmark(depth: int = 4, worker_counts: tuple[int, ...] = (1, 2, 4, 8, 16, 32),
+              positions: tuple[tuple[str, ...], ...] = BENCHMARK_POSITIONS) -> dict[int, float]:
+    """Times a fixed-depth search of the positions for each worker count and prints the speed-ups,
+    and the positions visited against the first worker count, the serial Engine if it is 1.
+
+    Returns:
+        A dictionary from worker count to speed-up over the first worker count
+    """
+    games = [setup_position(moves) for moves in positions]
+    timings = {}
+    node_counts = {}
+    for workers in worker_counts:
+        with ParallelEngine(workers) as parallel_engine:
+            # start the worker processes before timing
+            parallel_engine.search(games[0], depth=2)
+            start = time.perf_counter()
+            node_counts[workers] = sum(parallel_engine.search(game, depth=depth).nodes for game in games)
+            timings[workers] = time.perf_counter() - start
+    speedups = {}
+    for workers, elapsed in timings.items():
+        speedups[workers] = timings[worker_counts[0]] / elapsed
+        print(f"{workers:>3} workers  {elapsed:8.2f}s  speed-up {speedups[workers]:5.2f}x  "
+              f"{node_counts[workers]:>9} nodes {node_counts[workers] / node_counts[worker_counts[0]]:5.2f}x")
+    return speedups
+
+
+def main() -> None:
+    """Runs the speed-up benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=4, help="search depth of each position")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32], help="worker counts to time")
+    args = parser.parse_args()
+    benchmark(args.depth, tuple(args.workers))
+
+
+if __name__ == "__main__":
+    main()
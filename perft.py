@@ -0,0 +1,258 @@
+"""Perft node counts and move throughput benchmarks for ChessVar.
+
+Run "python perft.py" to check the pinned node counts and the recorded move flags,
+"python perft.py --divide start 3" for a per-move breakdown,
+and "python perft.py --bench" for the throughput benchmark.
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from ChessVar import ChessVar, MOVE_CAPTURE, MOVE_DOUBLE_STEP, MOVE_KILLS_KING, move_to_coordinates
+
+
+# positions to count, as (name, moves from the starting position, {depth: node count})
+# the explosion positions put kings, queens, and knights within reach of each other,
+# including kings standing next to each other and pawns that can step onto their own pieces
+PERFT_POSITIONS = (
+    ("start", (), {1: 20, 2: 400, 3: 9382, 4: 219763, 5: 5840164}),
+    ("knight-raid", ("b1-c3", "g8-f6", "c3-d5", "f6-e4"), {1: 26, 2: 659, 3: 16700, 4: 451189}),
+    ("queen-strike", ("e2-e3", "e7-e6", "d1-h5", "d8-h4", "b1-c3", "b8-c6"), {1: 51, 2: 2515, 3: 116721, 4: 5362431}),
+    ("open-center", ("d2-d4", "e7-e5", "d4-e5", "d7-d5", "c1-g5", "f8-b4"), {1: 33, 2: 1285, 3: 42419, 4: 1675665}),
+    ("adjacent-kings", ("e2-e4", "e7-e5", "e1-e2", "e8-e7", "e2-e3", "e7-e6", "e3-d3", "e6-d6",
+                        "d3-c4", "d6-c5", "d1-h5", "d8-h4"), {1: 38, 2: 1439, 3: 53575, 4: 1989151}),
+    ("pawn-steps", ("b1-c3", "g8-f6", "g1-f3", "b8-c6", "d2-d4", "f6-e4"), {1: 35, 2: 1106, 3: 37375, 4: 1161129}),
+)
+
+# moves whose recorded flags are pinned, as (position name from PERFT_POSITIONS, move, flags)
+PINNED_FLAGS = (
+    ("start", "e2-e3", 0),
+    ("start", "e2-e4", MOVE_DOUBLE_STEP),
+    ("knight-raid", "d5-c7", MOVE_CAPTURE),
+    ("knight-raid", "d5-e7", MOVE_CAPTURE | MOVE_KILLS_KING),
+    ("pawn-steps", "c3-e4", MOVE_CAPTURE),
+)
+
+
+def setup_position(moves: tuple[str, ...], representation: str = "bitboards") -> ChessVar:
+    """Returns a new game with the moves, written as "e2-e4", made from the starting position"""
+    game = ChessVar(representation)
+    for move in moves:
+        move_from, move_to = move.split("-")
+        if not game.make_move(move_from, move_to):
+            raise ValueError(f"Illegal setup move: {move}")
+    return game
+
+
+def perft(game: ChessVar, depth: int) -> int:
+    """Returns the number of move sequences of the given length from the position.
+    Finished games have no moves, so they end a sequence early and are not counted.
+    """
+    if depth == 0:
+        return 1
+    moves = game.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        game.push_move(move)
+        nodes += perft(game, depth - 1)
+        game.unmake_move()
+    return nodes
+
+
+def divide(game: ChessVar, depth: int) -> dict[str, int]:
+    """Returns the perft node count below each legal move, keyed by moves written as "e2-e4"."""
+    counts = {}
+    for move in game.legal_moves():
+        game.push_move(move)
+        counts["-".join(move_to_coordinates(move))] = perft(game, depth - 1)
+        game.unmake_move()
+    return counts
+
+
+def run_perft_suite(max_depth: int = 3, representation: str = "bitboards") -> bool:
+    """Counts every pinned position up to max_depth and prints the results.
+
+    Returns:
+        True if every count matches its pinned value
+    """
+    all_passed = True
+    for name, moves, expected_counts in PERFT_POSITIONS:
+        game = setup_position(moves, representation)
+        for depth, expected in sorted(expected_counts.items()):
+            if depth > max_depth:
+                continue
+            start = time.perf_counter()
+            nodes = perft(game, depth)
+            elapsed = time.perf_counter() - start
+            passed = nodes == expected
+            all_passed = all_passed and passed
+            print(f"{name:<16} depth {depth}  {nodes:>10}  {'ok' if passed else f'expected {expected}'}"
+                  f"  {elapsed:.3f}s")
+    return all_passed
+
+
+def check_move_history(games: int = 100, seed: int = 1) -> bool:
+    """Checks that get_move_history records every move as the same packed integer that legal_moves returns for it:
+    the PINNED_FLAGS moves made with make_move and apply_moves in both representations,
+    then random games made with make_move and replayed with apply_moves.
+
+    Returns:
+        True if every recorded move matches, which is also printed
+    """
+    mismatches = 0
+    positions = {name: moves for name, moves, _ in PERFT_POSITIONS}
+    for name, move, flags in PINNED_FLAGS:
+        move_from, move_to = move.split("-")
+        for representation in ("bitboards", "objects"):
+            for apply in (False, True):
+                game = setup_position(positions[name], representation)
+                legal_move = next(legal_move for legal_move in game.legal_moves()
+                                  if move_to_coordinates(legal_move) == (move_from, move_to))
+                # a king explosion announces the winner
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if apply:
+                        game.apply_moves([(move_from, move_to)])
+                    else:
+                        game.make_move(move_from, move_to)
+                recorded = game.get_move_history()[-1]
+                if recorded != legal_move or recorded >> 12 != flags:
+                    mismatches += 1
+
+    rng = random.Random(seed)
+    for game_number in range(games):
+        game = ChessVar(("bitboards", "objects")[game_number % 2])
+        for _ in range(rng.randrange(1, 80)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            with contextlib.redirect_stdout(io.StringIO()):
+                game.make_move(*move_to_coordinates(move))
+            if game.get_move_history()[-1] != move:
+                mismatches += 1
+        applied_game = ChessVar("bitboards")
+        applied_game.apply_moves([move_to_coordinates(move) for move in game.get_move_history()])
+        if applied_game.get_move_history() != game.get_move_history():
+            mismatches += 1
+    print(f"move history     {len(PINNED_FLAGS)} pinned moves, {games} games  "
+          f"{'ok' if not mismatches else f'{mismatches} moves recorded differently'}")
+    return not mismatches
+
+
+def benchmark_positions(count: int = 200, seed: int = 1) -> list[list[int]]:
+    """Returns a repeatable set of packed move sequences that lead to unfinished games by random play"""
+    rng = random.Random(seed)
+    sequences = []
+    while len(sequences) < count:
+        game = ChessVar("bitboards")
+        sequence = []
+        for _ in range(rng.randrange(0, 40)):
+            moves = game.legal_moves()
+            if not moves:
+                break
+            sequence.append(rng.choice(moves))
+            game.push_move(sequence[-1])
+        if game.legal_moves():
+            sequences.append(sequence)
+    return sequences
+
+
+def replay(sequence: list[int], representation: str) -> ChessVar:
+    """Returns a new game with the packed moves made from the starting position"""
+    game = ChessVar(representation)
+    for move in sequence:
+        game.push_move(move)
+    return game
+
+
+def benchmark(rounds: int = 5, seed: int = 1) -> dict[str, float]:
+    """Measures move generation, move making, and capture resolution throughput on a fixed set of positions.
+
+    Returns:
+        A dictionary of rates per second, which is also printed
+    """
+    sequences = benchmark_positions(seed=seed)
+    games = [replay(sequence, "bitboards") for sequence in sequences]
+    object_games = [replay(sequence, "objects") for sequence in sequences[:50]]
+    results = {}
+
+    # legal moves of the bitboard games, generated without the cache
+    generated = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for game in games:
+            generated += len(game.generate_legal_moves())
+    results["legal moves generated"] = generated / (time.perf_counter() - start)
+
+    # possible_moves of every ChessPiece of the object games
+    generated = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for game in object_games:
+            board = game.get_board()
+            for chess_piece in game.get_chess_pieces().values():
+                generated += len(chess_piece.possible_moves(board))
+    results["possible_moves generated"] = generated / (time.perf_counter() - start)
+
+    # moves made and taken back, split into quiet moves and captures
+    quiet_moves = [(game, move) for game in games for move in game.legal_moves() if not move >> 12 & MOVE_CAPTURE]
+    captures = [(game, move) for game in games for move in game.legal_moves() if move >> 12 & MOVE_CAPTURE]
+    for label, sample in (("moves made", quiet_moves), ("captures resolved", captures)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for game, move in sample:
+                game.push_move(move)
+                game.unmake_move()
+        results[label] = len(sample) * rounds / (time.perf_counter() - start)
+
+    # make_move with algebraic coordinates, including its checks, in both representations
+    string_moves = [(game, move_to_coordinates(move)) for game, move in quiet_moves + captures
+                    if not move >> 12 & MOVE_KILLS_KING]
+    start = time.perf_counter()
+    for game, (move_from, move_to) in string_moves:
+        game.make_move(move_from, move_to)
+        game.unmake_move()
+    results["make_move calls (bitboards)"] = len(string_moves) / (time.perf_counter() - start)
+    object_moves = [(game, move_to_coordinates(move)) for game in object_games for move in game.legal_moves()
+                    if not move >> 12 & MOVE_KILLS_KING]
+    start = time.perf_counter()
+    for game, (move_from, move_to) in object_moves:
+        game.make_move(move_from, move_to)
+        game.unmake_move()
+    results["make_move calls (objects)"] = len(object_moves) / (time.perf_counter() - start)
+
+    for label, rate in results.items():
+        print(f"{label:<30} {rate:>12,.0f} /s")
+    return results
+
+
+def main() -> None:
+    """Runs the perft suite, a divide, or the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=3, help="deepest pinned depth to check")
+    parser.add_argument("--divide", nargs=2, metavar=("POSITION", "DEPTH"), help="per-move node counts")
+    parser.add_argument("--bench", action="store_true", help="run the throughput benchmark")
+    parser.add_argument("--representation", default="bitboards", choices=("bitboards", "objects"))
+    args = parser.parse_args()
+
+    if args.divide:
+        positions = {name: moves for name, moves, _ in PERFT_POSITIONS}
+        game = setup_position(positions[args.divide[0]], args.representation)
+        counts = divide(game, int(args.divide[1]))
+        for move, nodes in sorted(counts.items()):
+            print(f"{move}: {nodes}")
+        print(f"total: {sum(counts.values())}")
+    elif args.bench:
+        benchmark()
+    else:
+        passed = run_perft_suite(args.depth, args.representation)
+        passed = check_move_history() and passed
+        raise SystemExit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
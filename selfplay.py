@@ -0,0 +1,169 @@
+"""Self-play game generation for ChessVar over a process pool.
+
+Run "python selfplay.py --games 10000 --output games.jsonl" to play random games,
+or add "--policy engine --depth 2" to choose the moves with the search engine.
+Every game is written as one JSON line as soon as its batch finishes.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Optional
+
+from ChessVar import ChessVar, MOVE_KILLS_KING, move_to_coordinates
+from engine import Engine
+
+
+def opening_moves(game: ChessVar, opening: tuple[str, ...]) -> list[int]:
+    """Returns the packed moves of an opening written as "e2-e4" moves, made silently on the game.
+
+    Raises:
+        ValueError: If a move of the opening is not legal
+    """
+    moves = []
+    for written_move in opening:
+        coordinates = tuple(written_move.split("-"))
+        for move in game.legal_moves():
+            if move_to_coordinates(move) == coordinates:
+                break
+        else:
+            raise ValueError(f"Illegal opening move: {written_move}")
+        game.push_move(move)
+        moves.append(move)
+    return moves
+
+
+def play_game(opening: tuple[str, ...] = (), policy: str = "random", depth: int = 1, random_plies: int = 0,
+              max_plies: int = 200, seed: Optional[int] = None, engine: Optional[Engine] = None) -> dict:
+    """Plays one game from the opening without printing anything.
+
+    Args:
+        opening: Moves written as "e2-e4" that are made before the game is played out
+        policy: "random" for random moves that always explode a king when one can,
+            or "engine" for moves chosen by a fixed-depth search
+        depth: The search depth of the engine policy
+        random_plies: The number of random moves after the opening, so engine games do not repeat
+        max_plies: The number of moves after which an unfinished game is stopped
+        seed: The seed of the random moves
+        engine: The Engine of the engine policy, a new one if None
+    Returns:
+        A dictionary with the opening, the moves written as "e2-e4", the number of plies, and the game state
+    """
+    if policy not in ("random", "engine"):
+        raise ValueError(f"Unknown policy: {policy}")
+    if policy == "engine" and engine is None:
+        engine = Engine()
+    rng = random.Random(seed)
+    game = ChessVar("bitboards")
+    moves = opening_moves(game, opening)
+    while len(moves) < max_plies:
+        legal_moves = game.legal_moves()
+        if not legal_moves:
+            break
+        if policy == "random" or len(moves) < len(opening) + random_plies:
+            # a random player still takes a king when it can
+            king_captures = [move for move in legal_moves if move >> 12 & MOVE_KILLS_KING]
+            move = rng.choice(king_captures or legal_moves)
+        else:
+            move = engine.search(game, depth).move
+        game.push_move(move)
+        moves.append(move)
+    return {
+        "opening": list(opening),
+        "moves": ["-".join(move_to_coordinates(move)) for move in moves],
+        "plies": len(moves),
+        "result": game.get_game_state(),
+    }
+
+
+def _play_batch(openings: tuple[tuple[str, ...], ...], first_game: int, count: int, policy: str, depth: int,
+                random_plies: int, max_plies: int, seed: int) -> tuple[list[str], int]:
+    """Plays a batch of games in a worker process and returns them as JSON lines with their total number of moves.
+    Game i uses opening i modulo the number of openings and the seed plus i, so runs are repeatable.
+    """
+    engine = Engine() if policy == "engine" else None
+    lines = []
+    moves = 0
+    for game_number in range(first_game, first_game + count):
+        record = play_game(openings[game_number % len(openings)], policy, depth, random_plies, max_plies,
+                           seed + game_number, engine)
+        record["game"] = game_number
+        lines.append(json.dumps(record, separators=(",", ":")))
+        moves += record["plies"]
+    return lines, moves
+
+
+def run_selfplay(games: int, output: str, openings: tuple[tuple[str, ...], ...] = ((),), policy: str = "random",
+                 depth: int = 1, random_plies: int = 0, max_plies: int = 200, seed: int = 0,
+                 workers: Optional[int] = None, batch_size: int = 100) -> dict[str, float]:
+    """Plays games across a pool of worker processes and appends them to the output file as JSON lines.
+    At most two batches per worker are in flight, and each batch is written as soon as it finishes,
+    so the lines are in the order the batches finish. The games and moves per second are printed after every batch.
+
+    Returns:
+        A dictionary with the games, moves, seconds, and games and moves per second of the run
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    games_played = moves_played = 0
+    with ProcessPoolExecutor(workers) as executor, open(output, "a") as output_file:
+        first_games = iter(range(0, games, batch_size))
+        running = set()
+        while True:
+            # a bounded window keeps unwritten games out of memory and lets a slow batch finish on its own
+            for first_game in itertools.islice(first_games, 2 * workers - len(running)):
+                running.add(executor.submit(_play_batch, openings, first_game, min(batch_size, games - first_game),
+                                            policy, depth, random_plies, max_plies, seed))
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                lines, moves = future.result()
+                output_file.write("".join(line + "\n" for line in lines))
+                output_file.flush()
+                games_played += len(lines)
+                moves_played += moves
+                elapsed = time.perf_counter() - start
+                print(f"{games_played:>10} games  {games_played / elapsed:10,.1f} games/s  "
+                      f"{moves_played / elapsed:12,.0f} moves/s")
+    elapsed = time.perf_counter() - start
+    return {
+        "games": games_played,
+        "moves": moves_played,
+        "seconds": elapsed,
+        "games per second": games_played / elapsed,
+        "moves per second": moves_played / elapsed,
+    }
+
+
+def read_openings(path: str) -> tuple[tuple[str, ...], ...]:
+    """Reads openings from a text file with one opening of space separated "e2-e4" moves per line"""
+    with open(path) as openings_file:
+        return tuple(tuple(line.split()) for line in openings_file if line.strip())
+
+
+def main() -> None:
+    """Runs self-play from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("--output", default="selfplay.jsonl", help="JSON lines file the games are appended to")
+    parser.add_argument("--openings", help="file with one opening of space separated moves per line")
+    parser.add_argument("--policy", default="random", choices=("random", "engine"))
+    parser.add_argument("--depth", type=int, default=1, help="search depth of the engine policy")
+    parser.add_argument("--random-plies", type=int, default=0, help="random moves after the opening")
+    parser.add_argument("--max-plies", type=int, default=200, help="moves after which a game is stopped")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU core by default")
+    parser.add_argument("--batch-size", type=int, default=100, help="games per worker task")
+    args = parser.parse_args()
+
+    openings = read_openings(args.openings) if args.openings else ((),)
+    run_selfplay(args.games, args.output, openings, args.policy, args.depth, args.random_plies, args.max_plies,
+                 args.seed, args.workers, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
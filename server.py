@@ -0,0 +1,367 @@
+"""An asyncio server hosting many ChessVar games over a TCP line protocol, with a load-test client.
+
+Run "python server.py serve --port 8765" to start the server
+and "python server.py load --port 8765 --clients 200" to measure request latency against it.
+
+Every request is one line of space separated words and gets one response line starting with OK or ERR:
+
+    NEW [objects|bitboards]     OK <game id>
+    MOVE <id> <from> <to>       OK <game state>, or ERR <reason> such as ERR illegal_geometry
+    MOVES <id>                  OK <legal moves written as e2-e4>
+    UNDO <id>                   OK <game state>
+    STATE <id>                  OK <game state> <current player>
+    FEN <id>                    OK <atomic FEN string>
+    BOARD <id>                  OK <line count>, followed by the lines of the board
+    SUB <id> / UNSUB <id>       OK, and while subscribed: EVENT <id> <from>-<to> <game state>
+    CLOSE <id>                  OK, and subscribers receive CLOSED <id>
+    STATS                       OK games=<count> connections=<count> dropped=<count>
+    QUIT                        OK, then the connection is closed
+
+Each connection has a bounded queue of outgoing lines. A client that stops reading its responses stops
+having its requests read, and a subscriber whose queue is full loses the subscription instead of
+holding up the game, so it should send FEN to catch up after subscribing again.
+The games a connection created are closed when it disconnects, as if it had sent CLOSE for each of them.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Optional
+
+from ChessVar import MOVE_ACCEPTED, REJECT_REASONS, ChessVar, move_to_coordinates
+
+
+class Connection:
+    """A client connection with a bounded queue of outgoing lines, written by its own task.
+
+    Attributes:
+        writer: The asyncio StreamWriter of the connection.
+        queue: An asyncio.Queue of the lines waiting to be written.
+        subscriptions: A set of the ids of the games the connection is subscribed to.
+        games: A set of the ids of the open games the connection created.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int) -> None:
+        """Initializes the connection with an empty queue."""
+        self._writer = writer
+        self._queue = asyncio.Queue(queue_size)
+        self._subscriptions = set()
+        self._games = set()
+
+    def get_subscriptions(self) -> set[int]:
+        """Returns the set of subscribed game ids."""
+        return self._subscriptions
+
+    def get_games(self) -> set[int]:
+        """Returns the set of ids of the open games the connection created."""
+        return self._games
+
+    async def send(self, lines: list[str]) -> None:
+        """Queues lines, waiting while the queue is full."""
+        for line in lines:
+            await self._queue.put(line)
+
+    def push(self, line: str) -> bool:
+        """Queues a line without waiting. Returns false if the queue is full."""
+        try:
+            self._queue.put_nowait(line)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def write_lines(self) -> None:
+        """Writes the queued lines until cancelled, draining the socket whenever the queue runs empty.
+        Once the client has disconnected, the queued lines are discarded.
+        """
+        connected = True
+        while True:
+            line = await self._queue.get()
+            if connected:
+                try:
+                    self._writer.write(line.encode() + b"\n")
+                    if self._queue.empty():
+                        await self._writer.drain()
+                except ConnectionError:
+                    connected = False
+            self._queue.task_done()
+
+    async def flush(self) -> None:
+        """Waits until the queued lines have been written and drained, or discarded."""
+        await self._queue.join()
+
+
+class GameSession:
+    """A hosted game and its subscribed connections.
+
+    Attributes:
+        game: The ChessVar game.
+        subscribers: A set of the connections subscribed to the game.
+        owner: The connection that created the game.
+    """
+
+    def __init__(self, game: ChessVar, owner: Connection) -> None:
+        """Initializes the session of a game without subscribers."""
+        self._game = game
+        self._subscribers = set()
+        self._owner = owner
+
+    def get_game(self) -> ChessVar:
+        """Returns the ChessVar game of the session."""
+        return self._game
+
+    def get_owner(self) -> Connection:
+        """Returns the connection that created the game."""
+        return self._owner
+
+    def get_subscribers(self) -> set[Connection]:
+        """Returns the set of subscribed connections."""
+        return self._subscribers
+
+
+class GameServer:
+    """Hosts games for any number of connections on one event loop.
+    Moves are made silently with ChessVar.apply_moves, so the server never prints.
+
+    Attributes:
+        sessions: A dictionary from game ids to GameSessions.
+        next_id: The id of the next new game.
+        connections: A set of the open connections.
+        queue_size: The number of outgoing lines each connection can queue.
+        dropped: The number of subscriptions dropped because a subscriber fell behind.
+    """
+
+    def __init__(self, queue_size: int = 1000) -> None:
+        """Initializes the server without games."""
+        self._sessions = {}
+        self._next_id = 1
+        self._connections = set()
+        self._queue_size = queue_size
+        self._dropped = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.Server:
+        """Starts listening and returns the asyncio Server."""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves the requests of one connection until it closes or sends QUIT."""
+        connection = Connection(writer, self._queue_size)
+        self._connections.add(connection)
+        writer_task = asyncio.create_task(connection.write_lines())
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                # waiting for room in the queue stops reading requests from a client that does not read
+                await connection.send(self.handle_request(connection, words))
+                if words[0].upper() == "QUIT":
+                    await connection.flush()
+                    break
+        # a line longer than the reader limit raises ValueError
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for game_id in connection.get_subscriptions():
+                session = self._sessions.get(game_id)
+                if session is not None:
+                    session.get_subscribers().discard(connection)
+            # abandoned games would otherwise stay in memory for as long as the server runs
+            for game_id in list(connection.get_games()):
+                self._close_session(game_id)
+            self._connections.discard(connection)
+            writer_task.cancel()
+            writer.close()
+
+    def handle_request(self, connection: Connection, words: list[str]) -> list[str]:
+        """Handles one request and returns its response lines"""
+        command = words[0].upper()
+        if command == "NEW":
+            representation = words[1] if len(words) > 1 else "bitboards"
+            if representation not in ("objects", "bitboards"):
+                return ["ERR unknown_representation"]
+            game_id = self._next_id
+            self._next_id += 1
+            self._sessions[game_id] = GameSession(ChessVar(representation), connection)
+            connection.get_games().add(game_id)
+            return [f"OK {game_id}"]
+        if command == "STATS":
+            return [f"OK games={len(self._sessions)} connections={len(self._connections)} dropped={self._dropped}"]
+        if command == "QUIT":
+            return ["OK"]
+        if command not in ("MOVE", "MOVES", "UNDO", "STATE", "FEN", "BOARD", "SUB", "UNSUB", "CLOSE"):
+            return ["ERR unknown_command"]
+
+        # isdigit alone accepts digits such as "²" that int cannot parse
+        has_id = len(words) > 1 and words[1].isascii() and words[1].isdigit()
+        session = self._sessions.get(int(words[1])) if has_id else None
+        if session is None:
+            return ["ERR unknown_game"]
+        game_id = int(words[1])
+        game = session.get_game()
+        if command == "MOVE":
+            if len(words) != 4:
+                return ["ERR expected_from_and_to"]
+            result = game.apply_moves(((words[2], words[3]),))
+            if result.reason != MOVE_ACCEPTED:
+                return ["ERR " + REJECT_REASONS[result.reason].replace(" ", "_")]
+            self._publish(session, game_id, f"EVENT {game_id} {words[2]}-{words[3]} {game.get_game_state()}")
+            return [f"OK {game.get_game_state()}"]
+        if command == "MOVES":
+            return ["OK " + " ".join("-".join(move_to_coordinates(move)) for move in game.legal_moves())]
+        if command == "UNDO":
+            if not game.unmake_move():
+                return ["ERR no_moves"]
+            self._publish(session, game_id, f"EVENT {game_id} undo {game.get_game_state()}")
+            return [f"OK {game.get_game_state()}"]
+        if command == "STATE":
+            return [f"OK {game.get_game_state()} {game.get_current_player()}"]
+        if command == "FEN":
+            return [f"OK {game.to_fen()}"]
+        if command == "BOARD":
+            lines = game.board_string().split("\n")
+            return [f"OK {len(lines)}"] + lines
+        if command == "SUB":
+            session.get_subscribers().add(connection)
+            connection.get_subscriptions().add(game_id)
+            return ["OK"]
+        if command == "UNSUB":
+            session.get_subscribers().discard(connection)
+            connection.get_subscriptions().discard(game_id)
+            return ["OK"]
+        # CLOSE
+        self._close_session(game_id)
+        return ["OK"]
+
+    def _close_session(self, game_id: int) -> None:
+        """Tells the subscribers of a game that it is closed and removes it"""
+        session = self._sessions.pop(game_id)
+        self._publish(session, game_id, f"CLOSED {game_id}")
+        for subscriber in session.get_subscribers():
+            subscriber.get_subscriptions().discard(game_id)
+        session.get_owner().get_games().discard(game_id)
+
+    def _publish(self, session: GameSession, game_id: int, line: str) -> None:
+        """Queues a line for every subscriber, dropping the subscriptions of subscribers that have fallen behind"""
+        lagging = [subscriber for subscriber in session.get_subscribers() if not subscriber.push(line)]
+        for subscriber in lagging:
+            session.get_subscribers().discard(subscriber)
+            subscriber.get_subscriptions().discard(game_id)
+            self._dropped += 1
+
+
+async def serve(host: str, port: int, queue_size: int) -> None:
+    """Runs a GameServer until the process is stopped."""
+    server = await GameServer(queue_size).start(host, port)
+    print(f"Serving ChessVar games on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Returns the value below which the fraction of the sorted values falls"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def _load_client(host: str, port: int, games: int, moves: int, subscribe: bool, seed: int,
+                       latencies: list[float]) -> int:
+    """Plays random games through one connection, recording the latency of every request.
+
+    Returns:
+        The number of events received
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    events = 0
+
+    async def request(line: str) -> str:
+        nonlocal events
+        start = time.perf_counter()
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        while True:
+            response = (await reader.readline()).decode().rstrip("\n")
+            if not response.startswith(("EVENT", "CLOSED")):
+                break
+            events += 1
+        latencies.append(time.perf_counter() - start)
+        return response
+
+    for _ in range(games):
+        game_id = (await request("NEW"))[3:]
+        if subscribe:
+            await request(f"SUB {game_id}")
+        for _ in range(moves):
+            legal_moves = (await request(f"MOVES {game_id}"))[3:].split()
+            if not legal_moves:
+                break
+            move_from, move_to = rng.choice(legal_moves).split("-")
+            await request(f"MOVE {game_id} {move_from} {move_to}")
+        await request(f"CLOSE {game_id}")
+    await request("QUIT")
+    writer.close()
+    return events
+
+
+async def load_test(host: str, port: int, clients: int, games: int, moves: int, subscribe: bool) -> dict[str, float]:
+    """Runs concurrent load-test clients against a server and prints the request latency percentiles.
+
+    Args:
+        host: The host of the server
+        port: The port of the server
+        clients: The number of concurrent connections
+        games: The number of games each client plays one after another
+        moves: The most moves made in each game
+        subscribe: Whether the clients subscribe to their games
+    Returns:
+        A dictionary of the request count, requests per second, and latency percentiles in milliseconds
+    """
+    latencies = []
+    start = time.perf_counter()
+    events = await asyncio.gather(*(
+        _load_client(host, port, games, moves, subscribe, seed, latencies) for seed in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    results = {
+        "requests": len(latencies),
+        "requests per second": len(latencies) / elapsed,
+        "events": sum(events),
+        "p50 ms": percentile(latencies, 0.5) * 1000,
+        "p90 ms": percentile(latencies, 0.9) * 1000,
+        "p99 ms": percentile(latencies, 0.99) * 1000,
+        "max ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+    for label, value in results.items():
+        print(f"{label:<20} {value:>12,.2f}")
+    return results
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """Runs the server or the load test from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="host games until stopped")
+    load_parser = subparsers.add_parser("load", help="measure request latency against a running server")
+    for subparser in (serve_parser, load_parser):
+        subparser.add_argument("--host", default="127.0.0.1")
+        subparser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--queue-size", type=int, default=1000, help="outgoing lines queued per connection")
+    load_parser.add_argument("--clients", type=int, default=100, help="concurrent connections")
+    load_parser.add_argument("--games", type=int, default=5, help="games played by each client")
+    load_parser.add_argument("--moves", type=int, default=40, help="most moves made in each game")
+    load_parser.add_argument("--subscribe", action="store_true", help="subscribe to the played games")
+    args = parser.parse_args(arguments)
+
+    if args.command == "serve":
+        asyncio.run(serve(args.host, args.port, args.queue_size))
+    else:
+        asyncio.run(load_test(args.host, args.port, args.clients, args.games, args.moves, args.subscribe))
+
+
+if __name__ == "__main__":
+    main()
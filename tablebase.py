@@ -0,0 +1,407 @@
+"""Retrograde tablebases of pawnless atomic endgames for ChessVar.
+
+A table solves every position of one material, written as the pieces of white and black, such as "KQvK".
+Captures that do not explode a king lead to tables of less material, which are solved first.
+A table file starts with TABLE_HEADER followed by one byte per position index, see position_index:
+DRAW, NOT_A_POSITION, or the number of plies to the explosion of a king with best play,
+odd if the player to move wins and even if the player to move loses.
+
+Run "python tablebase.py generate KQvK KRvK --directory tables" to generate tables,
+and "python tablebase.py probe tables FEN" to look up a position.
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from array import array
+from typing import NamedTuple, Optional
+
+from ChessVar import (BISHOP, BLACK, EXPLOSION_MASKS, FEN_PIECES, KING, KNIGHT, MOVE_CAPTURE, MOVE_KILLS_KING, PAWN,
+                      QUEEN, ROOK, WHITE, ChessVar, bitboard_squares, move_to_coordinates)
+
+
+TABLE_MAGIC = b"ATOMTB1\n"
+# magic and material name
+TABLE_HEADER = struct.Struct("<8s16s")
+TABLE_SUFFIX = ".atb"
+DRAW = 0
+NOT_A_POSITION = 255
+MAX_PLIES = 254
+# the order of the pieces of one side in a material name and a position index
+PIECE_ORDER = (KING, QUEEN, ROOK, BISHOP, KNIGHT)
+
+
+class TablebaseResult(NamedTuple):
+    """The result of a position with best play for both players.
+
+    Attributes:
+        result: "win" or "loss" for the player to move, or "draw"
+        plies: The number of plies until a king explodes, 0 for a draw
+    """
+    result: str
+    plies: int
+
+
+def parse_material(material: str) -> tuple[int, ...]:
+    """Returns the piece codes of a material name such as "KQvK", white pieces first, in PIECE_ORDER.
+
+    Raises:
+        ValueError: If the name has pawns, unknown pieces, or not one king per side
+    """
+    sides = material.upper().split("V")
+    if len(sides) != 2:
+        raise ValueError(f"A material name has the pieces of both sides separated by 'v': {material}")
+    piece_codes = []
+    for color, side in zip((WHITE, BLACK), sides):
+        side_codes = []
+        for letter in side:
+            if letter not in "KQRBN":
+                raise ValueError(f"Tables cannot hold piece {letter!r}: {material}")
+            side_codes.append(color * 6 + FEN_PIECES.index(letter))
+        if side_codes.count(color * 6 + KING) != 1:
+            raise ValueError(f"Each side needs exactly one king: {material}")
+        piece_codes.extend(sorted(side_codes, key=lambda piece_code: PIECE_ORDER.index(piece_code % 6)))
+    return tuple(piece_codes)
+
+
+def material_name(piece_codes: tuple[int, ...]) -> str:
+    """Returns the material name of piece codes in the order of parse_material"""
+    white = "".join(FEN_PIECES[piece_code] for piece_code in piece_codes if piece_code < 6)
+    black = "".join(FEN_PIECES[piece_code - 6] for piece_code in piece_codes if piece_code >= 6)
+    return f"{white}v{black}"
+
+
+def table_size(piece_codes: tuple[int, ...]) -> int:
+    """Returns the number of position indexes of a table"""
+    return 2 * 64 ** len(piece_codes)
+
+
+def position_index(squares: list[int], black_to_move: bool) -> int:
+    """Returns the position index of the squares of the pieces, in the order of their piece codes.
+    Pieces of the same kind must be given in ascending square order.
+    """
+    index = 0
+    for square in squares:
+        index = index * 64 + square
+    return index * 2 + black_to_move
+
+
+def decode_index(index: int, piece_count: int) -> tuple[list[int], bool]:
+    """Returns the squares of the pieces and whether black is to move of a position index"""
+    black_to_move = bool(index & 1)
+    index >>= 1
+    squares = [0] * piece_count
+    for slot in range(piece_count - 1, -1, -1):
+        index, squares[slot] = divmod(index, 64)
+    return squares, black_to_move
+
+
+def game_material(game: ChessVar) -> Optional[tuple[tuple[int, ...], list[int]]]:
+    """Returns the piece codes and squares of a game in table order, or None if a table cannot hold it"""
+    piece_bitboards = game.get_piece_bitboards()
+    if piece_bitboards[PAWN] or piece_bitboards[6 + PAWN]:
+        return None
+    piece_codes = []
+    squares = []
+    for color in (WHITE, BLACK):
+        for piece_type in PIECE_ORDER:
+            for square in bitboard_squares(piece_bitboards[color * 6 + piece_type]):
+                piece_codes.append(color * 6 + piece_type)
+                squares.append(square)
+    if piece_codes.count(KING) != 1 or piece_codes.count(6 + KING) != 1:
+        return None
+    return tuple(piece_codes), squares
+
+
+def _is_position(piece_codes: tuple[int, ...], squares: list[int]) -> bool:
+    """Returns true if no two pieces share a square and pieces of the same kind are in ascending order"""
+    for slot in range(1, len(squares)):
+        if piece_codes[slot] == piece_codes[slot - 1] and squares[slot] <= squares[slot - 1]:
+            return False
+    return len(set(squares)) == len(squares)
+
+
+def _moved_squares(piece_codes: tuple[int, ...], squares: list[int], from_square: int, to_square: int) -> list[int]:
+    """Returns the squares after a quiet move, keeping pieces of the same kind in ascending order"""
+    squares = squares.copy()
+    slot = squares.index(from_square)
+    squares[slot] = to_square
+    while slot > 0 and piece_codes[slot - 1] == piece_codes[slot] and squares[slot - 1] > squares[slot]:
+        squares[slot - 1], squares[slot] = squares[slot], squares[slot - 1]
+        slot -= 1
+    while (slot < len(squares) - 1 and piece_codes[slot + 1] == piece_codes[slot]
+           and squares[slot + 1] < squares[slot]):
+        squares[slot + 1], squares[slot] = squares[slot], squares[slot + 1]
+        slot += 1
+    return squares
+
+
+def solve(material: str, tables: Optional[dict[str, bytearray]] = None, verbose: bool = False) -> bytearray:
+    """Solves every position of a material by retrograde analysis.
+
+    The moves of every position are generated once with ChessVar. Captures that explode a king are wins,
+    and other captures are looked up in the solved tables of less material. Starting from those results,
+    the positions are resolved one ply level at a time through the predecessors of the resolved positions:
+    a position with a move to a lost position is won, and a position whose every move leads to a won position
+    is lost. Positions that are never resolved are draws, including positions without legal moves.
+
+    Args:
+        material: A material name such as "KQvK"
+        tables: The solved tables by material name, which the new table and those it needs are added to
+        verbose: A boolean to print the progress
+    Returns:
+        The table of the material, one byte per position index
+    Raises:
+        ValueError: If the material name is not valid or a result takes more than MAX_PLIES plies
+    """
+    if tables is None:
+        tables = {}
+    piece_codes = parse_material(material)
+    name = material_name(piece_codes)
+    if name in tables:
+        return tables[name]
+    start = time.perf_counter()
+    piece_count = len(piece_codes)
+    size = table_size(piece_codes)
+    values = bytearray([NOT_A_POSITION]) * size
+    remaining = array("H", bytes(2 * size))
+    # the children of position index i are children[first_child[i]:first_child[i + 1]]
+    first_child = array("I", bytes(4 * (size + 1)))
+    children = array("I")
+    # resolved[level] holds the positions resolved at the level, external[level] the positions
+    # with a capture that leads to a position of another table resolved at the level
+    resolved = [[], []]
+    external = [[]]
+
+    game = ChessVar("bitboards")
+    board = [-1] * 64
+    for index in range(size):
+        first_child[index] = len(children)
+        squares, black_to_move = decode_index(index, piece_count)
+        if not _is_position(piece_codes, squares):
+            continue
+        values[index] = DRAW
+        for piece_code, square in zip(piece_codes, squares):
+            board[square] = piece_code
+        game._set_position(board, 0, "black" if black_to_move else "white", "UNFINISHED")
+        for square in squares:
+            board[square] = -1
+        moves = game.generate_legal_moves()
+        remaining[index] = len(moves)
+        for move in moves:
+            from_square = move & 63
+            to_square = move >> 6 & 63
+            flags = move >> 12
+            if flags & MOVE_KILLS_KING:
+                if values[index] == DRAW:
+                    values[index] = 1
+                    resolved[1].append(index)
+            elif flags & MOVE_CAPTURE:
+                exploded = EXPLOSION_MASKS[to_square] | 1 << from_square
+                kept = [(piece_code, square) for piece_code, square in zip(piece_codes, squares)
+                        if not exploded >> square & 1]
+                child_table = solve(material_name(tuple(piece_code for piece_code, _ in kept)), tables, verbose)
+                child_value = child_table[position_index([square for _, square in kept], not black_to_move)]
+                if child_value != DRAW:
+                    while len(external) <= child_value:
+                        external.append([])
+                    external[child_value].append(index)
+            else:
+                child_squares = _moved_squares(piece_codes, squares, from_square, to_square)
+                children.append(position_index(child_squares, not black_to_move))
+    first_child[size] = len(children)
+
+    # invert the child lists into predecessor lists
+    first_parent = array("I", bytes(4 * (size + 1)))
+    for child in children:
+        first_parent[child + 1] += 1
+    for index in range(size):
+        first_parent[index + 1] += first_parent[index]
+    parents = array("I", bytes(4 * len(children)))
+    next_parent = first_parent[:size]
+    for index in range(size):
+        for child in children[first_child[index]:first_child[index + 1]]:
+            parents[next_parent[child]] = index
+            next_parent[child] += 1
+    del children, first_child, next_parent
+
+    level = 1
+    while resolved[level] or level < len(external):
+        if level >= MAX_PLIES:
+            raise ValueError(f"{name} has results longer than {MAX_PLIES} plies")
+        while len(resolved) <= level + 1:
+            resolved.append([])
+        next_level = resolved[level + 1]
+        parent_lists = [parents[first_parent[child]:first_parent[child + 1]] for child in resolved[level]]
+        if level < len(external):
+            parent_lists.append(external[level])
+        for parent_list in parent_lists:
+            for parent in parent_list:
+                if values[parent] != DRAW:
+                    continue
+                # an odd level is won by the player to move in the child, an even level lost
+                if level & 1:
+                    remaining[parent] -= 1
+                    if remaining[parent]:
+                        continue
+                values[parent] = level + 1
+                next_level.append(parent)
+        level += 1
+    tables[name] = values
+    if verbose:
+        print(f"{name}: {size} indexes solved in {time.perf_counter() - start:.1f} s")
+    return values
+
+
+def table_path(directory: str, material: str) -> str:
+    """Returns the path of the table file of a material in a directory"""
+    return os.path.join(directory, material_name(parse_material(material)) + TABLE_SUFFIX)
+
+
+def write_table(path: str, material: str, values: bytes) -> None:
+    """Writes a solved table to a file."""
+    with open(path, "wb") as table_file:
+        table_file.write(TABLE_HEADER.pack(TABLE_MAGIC, material_name(parse_material(material)).encode("ascii")))
+        table_file.write(values)
+
+
+def generate(materials: list[str], directory: str, verbose: bool = False) -> list[str]:
+    """Solves the materials and the materials they need, and writes a table file of each to the directory.
+
+    Returns:
+        The material names of the written tables
+    """
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    for material in materials:
+        solve(material, tables, verbose)
+    for name, values in tables.items():
+        write_table(table_path(directory, name), name, values)
+    return list(tables)
+
+
+class Tablebase:
+    """Looks up positions in the table files of a directory through memory maps.
+    A table is mapped the first time a position of its material is probed. Use it as a context manager,
+    or call close.
+
+    Attributes:
+        directory: The directory of the table files.
+        tables: The mmap of every probed material name, or None if the directory has no table for it.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """Initializes a tablebase of the table files in the directory."""
+        self._directory = directory
+        self._tables = {}
+
+    def __enter__(self) -> "Tablebase":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the table files."""
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables.clear()
+
+    def _table(self, name: str) -> Optional[mmap.mmap]:
+        """Returns the mmap of a table, mapping it on first use
+
+        Raises:
+            ValueError: If the file is not a table of the material
+        """
+        if name not in self._tables:
+            path = table_path(self._directory, name)
+            table = None
+            if os.path.exists(path):
+                with open(path, "rb") as table_file:
+                    table = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, material = TABLE_HEADER.unpack_from(table)
+                expected_size = TABLE_HEADER.size + table_size(parse_material(name))
+                if (magic != TABLE_MAGIC or material.rstrip(b"\0") != name.encode("ascii")
+                        or len(table) != expected_size):
+                    table.close()
+                    raise ValueError(f"Not a table of {name}: {path}")
+            self._tables[name] = table
+        return self._tables[name]
+
+    def probe(self, game: ChessVar) -> Optional[TablebaseResult]:
+        """Returns the result of the position of an unfinished game,
+        or None if the game is over or there is no table for its material
+        """
+        if game.get_game_state() != "UNFINISHED":
+            return None
+        material = game_material(game)
+        if material is None:
+            return None
+        piece_codes, squares = material
+        table = self._table(material_name(piece_codes))
+        if table is None:
+            return None
+        value = table[TABLE_HEADER.size + position_index(squares, game.get_current_player() == "black")]
+        if value == DRAW:
+            return TablebaseResult("draw", 0)
+        return TablebaseResult("win" if value & 1 else "loss", value)
+
+    def best_move(self, game: ChessVar) -> Optional[int]:
+        """Returns a packed move that keeps the tablebase result of the position with the fastest win
+        or the slowest loss, or None if the position cannot be probed or has no legal moves.
+        The moves are made on the game and taken back.
+        """
+        if self.probe(game) is None:
+            return None
+        best_move = None
+        best_rank = None
+        for move in game.legal_moves():
+            if move >> 12 & MOVE_KILLS_KING:
+                return move
+            game.push_move(move)
+            child = self.probe(game)
+            game.unmake_move()
+            if child is None:
+                continue
+            # rank the moves by the result of the player who moved: fast wins, then draws, then slow losses
+            if child.result == "loss":
+                rank = (2, -child.plies)
+            elif child.result == "draw":
+                rank = (1, 0)
+            else:
+                rank = (0, child.plies)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+
+def main() -> None:
+    """Generates tables or probes a position from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate_parser = subparsers.add_parser("generate", help="solve materials such as KQvK and write their tables")
+    generate_parser.add_argument("materials", nargs="+")
+    generate_parser.add_argument("--directory", default="tables")
+    probe_parser = subparsers.add_parser("probe", help="look up the result and best move of a position")
+    probe_parser.add_argument("directory")
+    probe_parser.add_argument("fen", nargs="+", help="a position written by ChessVar.to_fen")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate(args.materials, args.directory, verbose=True)
+    else:
+        game = ChessVar.from_fen(" ".join(args.fen), "bitboards")
+        with Tablebase(args.directory) as tablebase:
+            result = tablebase.probe(game)
+            if result is None:
+                print("not in the tablebase")
+                return
+            move = tablebase.best_move(game)
+            best = "" if move is None else "  best move " + "-".join(move_to_coordinates(move))
+            print(f"{result.result} in {result.plies} plies{best}" if result.plies else f"draw{best}")
+
+
+if __name__ == "__main__":
+    main()